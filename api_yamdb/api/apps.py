@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.core import checks
+
+        from . import signals  # noqa: F401
+        from .throttling import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_versions
+
+USER_KEY = 'api:user:{}:{}'
+# Поля, которых достаточно для проверки прав. Остальные поля
+# пользователя загружаются из базы при первом обращении.
+AUTH_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_staff',
+               'is_active')
+
+
+def user_resource(user_id):
+    """ Имя ресурса кэша, версия которого меняется при изменении
+    пользователя. """
+
+    return f'user:{user_id}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """ JWT аутентификация, которая берет пользователя из кэша.
+
+    В кэше хранятся только поля из AUTH_FIELDS, по которым собирается
+    пользователь без запроса к базе. Ключ кэша содержит версию
+    пользователя, которая увеличивается при каждом его сохранении,
+    поэтому изменение роли начинает действовать со следующего запроса.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        version, = get_versions((user_resource(user_id),))
+        key = USER_KEY.format(user_id, version)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(key, {field: getattr(user, field)
+                            for field in AUTH_FIELDS},
+                      settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        # from_db ожидает значения в порядке полей модели.
+        fields = [field.attname
+                  for field in self.user_model._meta.concrete_fields
+                  if field.attname in values]
+        user = self.user_model.from_db(
+            DEFAULT_DB_ALIAS, fields, [values[field] for field in fields])
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return user
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .compression import (choose_encoding, get_compressed_variant,
+                          precompressed_response)
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+STATS_KEY = 'api:cache-stats:{}'
+PRIMARY_KEY = 'api:primary:{}'
+
+_deferred = threading.local()
+
+
+def get_versions(resources):
+    """ Возвращает текущие версии ресурсов. Отсутствующая версия
+    создается со значением от текущего времени, чтобы после вытеснения
+    ключа из кэша версии не повторялись. """
+
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*resources):
+    """ Увеличивает версии ресурсов, после чего закэшированные ответы,
+    зависящие от них, больше не используются. """
+
+    for resource in resources:
+        key = VERSION_KEY.format(resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+    pin_to_primary(*resources)
+
+
+def pin_to_primary(*resources):
+    """ На REPLICA_PIN_SECONDS направляет чтение ресурсов в основную
+    базу, пока реплики не получили изменения. """
+
+    if settings.DATABASE_REPLICAS and resources:
+        cache.set_many(
+            {PRIMARY_KEY.format(resource): True for resource in resources},
+            settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(resources):
+    """ Проверяет, что ресурсы недавно изменялись. """
+
+    return bool(resources) and bool(cache.get_many(
+        [PRIMARY_KEY.format(resource) for resource in resources]))
+
+
+def bump_versions_on_commit(*resources):
+    """ Сбрасывает кэш ресурсов сразу и еще раз после фиксации текущей
+    транзакции: ответы, закэшированные до фиксации, могли содержать
+    старые данные. Внутри single_bump ресурсы только запоминаются. """
+
+    deferred = getattr(_deferred, 'resources', None)
+    if deferred is not None:
+        deferred.update(resources)
+        return
+    bump_versions(*resources)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_versions(*resources))
+
+
+@contextmanager
+def single_bump():
+    """ Сбрасывает кэш ресурсов, измененных внутри блока, один раз при
+    выходе из него, а не после сохранения каждого объекта. """
+
+    if getattr(_deferred, 'resources', None) is not None:
+        yield
+        return
+    _deferred.resources = set()
+    try:
+        yield
+    finally:
+        resources, _deferred.resources = _deferred.resources, None
+        if resources:
+            bump_versions_on_commit(*sorted(resources))
+
+
+def count(event):
+    key = STATS_KEY.format(event)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats():
+    """ Возвращает счетчики попаданий и промахов кэша ответов. """
+
+    keys = {'hits': STATS_KEY.format('hit'),
+            'misses': STATS_KEY.format('miss')}
+    values = cache.get_many(keys.values())
+    return {name: values.get(key, 0) for name, key in keys.items()}
+
+
+class ResponseCacheMixin:
+    """ Кэширует ответы на GET-запросы к вьюсету.
+
+    Ключ ответа включает схему, хост, путь, отсортированные параметры
+    запроса и версии ресурсов из cache_resources, поэтому изменение
+    любого из них сразу делает старые ответы недоступными. Сжатые
+    CompressionMiddleware ответы хранятся под тем же ключом для каждой
+    кодировки.
+    """
+
+    cache_resources = ()
+
+    def get_cache_key(self, request):
+        query = sorted(
+            (key, value) for key, values in request.query_params.lists()
+            for value in values)
+        # Ответы содержат абсолютные ссылки пагинации, построенные по
+        # схеме и заголовку Host запроса.
+        raw = repr((request.scheme, request.get_host(), request.path, query,
+                    get_versions(self.cache_resources)))
+        return RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        # Сжатые варианты хранятся только для JSON, ответы браузерного
+        # API рендерятся заново.
+        encoding = None
+        if request.accepted_renderer.format == 'json':
+            encoding = choose_encoding(request)
+        variant = encoding and get_compressed_variant(key, encoding)
+        if variant:
+            count('hit')
+            response = precompressed_response(variant, encoding)
+            response['X-Cache'] = 'HIT'
+            return response
+        data = cache.get(key)
+        if data is not None:
+            count('hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+        else:
+            count('miss')
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        if encoding and response.status_code == 200:
+            # CompressionMiddleware сохранит сжатый ответ под этим ключом.
+            response.compressed_cache_key = key
+        return response
+
+
+class CachedListMixin(ResponseCacheMixin):
+    """ Кэширует ответы на запросы к списку объектов. """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(ResponseCacheMixin):
+    """ Кэширует ответы на запросы к отдельному объекту. """
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,138 @@
+""" Сжатие ответов gzip и brotli.
+
+CompressionMiddleware выбирает кодировку по Accept-Encoding и сжимает
+текстовые ответы больше COMPRESSION_MIN_SIZE байт, потоковые ответы
+сжимаются по мере отправки. Ответы, закэшированные ResponseCacheMixin,
+сохраняются в кэш и в сжатом виде, поэтому повторные запросы не
+выполняют ни сериализацию, ни сжатие.
+"""
+import re
+import zlib
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+COMPRESSED_KEY = 'api:compressed:{}:{}'
+# Кодировки в порядке предпочтения при одинаковом q.
+ENCODINGS = ('br', 'gzip')
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+QUALITY_RE = re.compile(r'(?:^|;)\s*q=([0-9.]+)')
+
+
+def parse_accept_encoding(header):
+    """ Возвращает словарь кодировок из Accept-Encoding с их q. """
+
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        match = QUALITY_RE.search(params)
+        try:
+            quality = float(match.group(1)) if match else 1.0
+        except ValueError:
+            quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(request):
+    """ Кодировка с наибольшим q из поддерживаемых или None. """
+
+    accepted = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    qualities = {encoding: accepted.get(encoding, accepted.get('*', 0))
+                 for encoding in ENCODINGS}
+    encoding = max(ENCODINGS, key=qualities.get)
+    return encoding if qualities[encoding] > 0 else None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """ Сжимает поток частями, не собирая его в памяти. """
+
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(
+            settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def precompressed_response(variant, encoding):
+    """ Ответ из сжатого варианта, сохраненного в кэше. """
+
+    content_type, content = variant
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Encoding'] = encoding
+    response.precompressed = True
+    return response
+
+
+def get_compressed_variant(key, encoding):
+    return cache.get(COMPRESSED_KEY.format(encoding, key))
+
+
+class CompressionMiddleware:
+    """ Сжимает ответы gzip или brotli по Accept-Encoding. """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(response, 'precompressed', False):
+            return self.finalize(response, response['Content-Encoding'])
+        encoding = choose_encoding(request)
+        if encoding is None or not self.is_compressible(response):
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+            return self.finalize(response, encoding)
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        key = getattr(response, 'compressed_cache_key', None)
+        if key is not None:
+            cache.set(COMPRESSED_KEY.format(encoding, key),
+                      (response['Content-Type'], content),
+                      settings.API_CACHE_TIMEOUT)
+        return self.finalize(response, encoding)
+
+    @staticmethod
+    def is_compressible(response):
+        return (response.status_code == 200
+                and not response.has_header('Content-Encoding')
+                and 'no-transform' not in response.get('Cache-Control', '')
+                and response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_TYPES))
+
+    @staticmethod
+    def finalize(response, encoding):
+        response['Content-Encoding'] = encoding
+        if not response.streaming:
+            response['Content-Length'] = str(len(response.content))
+        patch_vary_headers(response, ('Accept-Encoding',))
+        # Сжатый ответ не совпадает побайтово с несжатым.
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
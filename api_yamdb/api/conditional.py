@@ -0,0 +1,50 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """ Поддерживает условные GET-запросы к вьюсету.
+
+    ETag и Last-Modified вычисляются по отметке времени последнего
+    изменения ресурса, которую возвращают get_list_last_modified и
+    get_object_last_modified. Если клиент прислал совпадающие
+    If-None-Match или If-Modified-Since, ответ 304 возвращается без
+    сериализации данных.
+    """
+
+    def get_list_last_modified(self):
+        return None
+
+    def get_object_last_modified(self):
+        return None
+
+    def conditional_response(self, handler, last_modified, request,
+                             *args, **kwargs):
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        # JSON и браузерный API получают разные ETag.
+        raw = (f'{request.get_full_path()}:{request.accepted_media_type}:'
+               f'{last_modified.isoformat()}')
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, self.get_list_last_modified(),
+            request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, self.get_object_last_modified(),
+            request, *args, **kwargs)
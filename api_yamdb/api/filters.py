@@ -1,5 +1,9 @@
+from django.db import connections
+from django.db.models import F
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from rest_framework.filters import OrderingFilter
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import search_titles
 
 
 class CharFilterInFilter(filters.BaseInFilter, filters.CharFilter):
@@ -8,13 +12,76 @@ class CharFilterInFilter(filters.BaseInFilter, filters.CharFilter):
 
 
 class TitleFilter(filters.FilterSet):
-    """ Фильтр для произведений. """
+    """ Фильтр для произведений.
 
-    genre = CharFilterInFilter(field_name='genre__slug', lookup_expr='in')
+    Жанры проверяются полусоединением pk IN (SELECT ...), а не
+    соединением с таблицей связей, поэтому произведения в результате не
+    повторяются, а подзапрос выбирает связи по индексу (genre, title).
+    genre оставляет произведения хотя бы с одним из жанров, genre_all —
+    со всеми перечисленными жанрами.
+    """
+
+    genre = CharFilterInFilter(method='filter_genre')
+    genre_all = CharFilterInFilter(method='filter_genre_all')
     year = filters.NumberFilter()
-    name = filters.CharFilter(lookup_expr='icontains')
-    category = CharFilterInFilter(field_name='category__slug')
+    name = filters.CharFilter(method='filter_name')
+    category = CharFilterInFilter(method='filter_category')
 
     class Meta:
         model = Title
-        fields = ('genre', 'year', 'name', 'category')
+        fields = ('genre', 'genre_all', 'year', 'name', 'category')
+
+    @staticmethod
+    def with_genres(slugs):
+        return GenreTitle.objects.filter(
+            genre__in=Genre.objects.filter(slug__in=slugs),
+        ).values('title')
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(pk__in=self.with_genres(value))
+
+    def filter_genre_all(self, queryset, name, value):
+        # Отдельное полусоединение для каждого жанра.
+        for slug in dict.fromkeys(value):
+            queryset = queryset.filter(pk__in=self.with_genres((slug,)))
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        # id категорий подставляются в запрос списком: при одной
+        # категории сортировка идет по составному индексу с категорией.
+        return queryset.filter(category__in=list(
+            Category.objects.filter(slug__in=value).values_list(
+                'pk', flat=True)))
+
+    def filter_name(self, queryset, name, value):
+        """ Поиск по названию через полнотекстовый индекс. """
+
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """ Сортировка произведений по индексированным полям.
+
+    К сортировке добавляется id в том же направлении, что и первое
+    поле, чтобы страницы не пересекались и порядок совпадал с
+    составными индексами. Произведения без рейтинга считаются худшими:
+    в PostgreSQL это задается явно, в SQLite NULL и так меньше чисел.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        if connections[queryset.db].vendor != 'postgresql':
+            return ordering
+        return [self.rating_nulls_lowest(field) for field in ordering]
+
+    @staticmethod
+    def rating_nulls_lowest(field):
+        if field == 'rating':
+            return F('rating').asc(nulls_first=True)
+        if field == '-rating':
+            return F('rating').desc(nulls_last=True)
+        return field
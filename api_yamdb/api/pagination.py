@@ -0,0 +1,134 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+from reviews.activity import KIND_ORDER, user_activity
+
+
+class PubDateCursorPagination(CursorPagination):
+    """ Курсорная пагинация для отзывов и комментариев.
+
+    Позиция курсора хранит дату публикации и id последнего объекта
+    страницы, по которым следующая страница выбирается условием
+    (pub_date, id) < позиции. Страница любой глубины выбирается по индексу
+    без OFFSET и без COUNT(*), а объекты с одинаковой датой не
+    пропускаются и не повторяются.
+    """
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+    # Параметры, включающие курсорную пагинацию вместо limit/offset.
+    mode_query_param = 'pagination'
+    mode_query_value = 'cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        """ Проверяет, запросил ли клиент курсорную пагинацию. """
+
+        params = request.query_params
+        return (cls.cursor_query_param in params
+                or params.get(cls.mode_query_param) == cls.mode_query_value)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        if self.cursor:
+            pub_date, pk = self.parse_position(self.cursor.position)
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date,
+                                                 id__gt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date,
+                                                 id__lt=pk))
+        queryset = queryset.order_by(
+            *(('pub_date', 'id') if reverse else self.ordering))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def parse_position(self, position):
+        try:
+            pub_date, pk = position.split('|')
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None:
+                raise ValueError
+            return pub_date, int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_link(self, instance, reverse):
+        # На пустой странице ссылки строятся от позиции текущего курсора.
+        position = (f'{instance.pub_date.isoformat()}|{instance.pk}'
+                    if instance else self.cursor.position)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=position))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.page[-1] if self.page else None, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(self.page[0] if self.page else None, True)
+
+
+class ActivityCursorPagination(CursorPagination):
+    """ Курсорная пагинация ленты активности пользователя.
+
+    Курсор хранит позицию (pub_date, тип, id) последней записи страницы,
+    по которой следующая страница выбирается из отзывов и комментариев
+    (см. reviews.activity).
+    """
+
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+    def paginate_activity(self, request, user):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position = cursor and self.parse_position(cursor.position)
+        rows = user_activity(user, self.page_size + 1, position)
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def parse_position(self, position):
+        try:
+            pub_date, kind, pk = position.split('|')
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None or kind not in KIND_ORDER:
+                raise ValueError
+            return pub_date, kind, int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=f"{last['pub_date'].isoformat()}|{last['type']}|"
+                     f"{last['id']}"))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
@@ -25,3 +25,12 @@ class IsUserOrAdmin(permissions.IsAuthenticated):
 
     def has_object_permission(self, request, view, obj):
         return request.user.username == obj.username
+
+
+class IsModeratorOrAdmin(permissions.IsAuthenticated):
+    """ Права для модераторов и администраторов. """
+
+    def has_permission(self, request, view):
+        return (super().has_permission(request, view)
+                and (request.user.is_superuser
+                     or request.user.role in ('moderator', 'admin')))
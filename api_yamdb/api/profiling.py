@@ -0,0 +1,175 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger('api.profiling')
+
+
+@contextmanager
+def server_timing(request, name):
+    """ Добавляет время выполнения блока к метрике name ответа.
+    Если запрос не профилируется, ничего не измеряет. """
+
+    timings = getattr(request, 'server_timings', None)
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (timings.get(name, 0)
+                         + time.perf_counter() - started)
+
+
+class QueryTimer:
+    """ Обертка выполнения SQL запросов, считающая их количество и
+    суммарное время. """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class ProfilingMiddleware:
+    """ Измеряет время обработки запросов.
+
+    При SERVER_TIMING ответ получает заголовок Server-Timing со временем
+    SQL запросов и этапов обработки во вьюсете. Доля запросов
+    PROFILING_SAMPLE_RATE выполняется под cProfile, результаты
+    сохраняются в PROFILING_DIR. Запросы дольше PROFILING_SLOW_REQUEST
+    секунд записываются в лог api.profiling. Если все отключено,
+    middleware не подключается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.SERVER_TIMING
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow_request = settings.PROFILING_SLOW_REQUEST
+        if not (self.server_timing or self.sample_rate > 0
+                or self.slow_request is not None):
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        sampled = (self.sample_rate > 0
+                   and random.random() < self.sample_rate)
+        if not (self.server_timing or sampled):
+            started = time.perf_counter()
+            try:
+                return self.get_response(request)
+            finally:
+                self.log_slow(request, time.perf_counter() - started)
+
+        request.server_timings = {}
+        timer = QueryTimer()
+        profiler = cProfile.Profile() if sampled else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            if profiler is not None:
+                profiler.enable()
+                stack.callback(profiler.disable)
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        if profiler is not None:
+            self.dump_profile(request, profiler, duration)
+        self.log_slow(request, duration, timer)
+        if self.server_timing:
+            response['Server-Timing'] = self.format_timings(
+                request.server_timings, timer, duration)
+        return response
+
+    @staticmethod
+    def format_timings(timings, timer, duration):
+        metrics = [
+            f'db;desc="{timer.count} queries";dur={timer.duration * 1000:.1f}'
+        ]
+        metrics.extend(f'{name};dur={value * 1000:.1f}'
+                       for name, value in timings.items())
+        metrics.append(f'total;dur={duration * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def log_slow(self, request, duration, timer=None):
+        if self.slow_request is None or duration < self.slow_request:
+            return
+        if timer is None:
+            logger.warning('Медленный запрос %s %s: %.0f мс',
+                           request.method, request.get_full_path(),
+                           duration * 1000)
+        else:
+            logger.warning(
+                'Медленный запрос %s %s: %.0f мс, SQL запросов %d '
+                '(%.0f мс)', request.method, request.get_full_path(),
+                duration * 1000, timer.count, timer.duration * 1000)
+
+    @staticmethod
+    def dump_profile(request, profiler, duration):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = re.sub(r'\W+', '-', request.path).strip('-') or 'root'
+        name = (f'{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method}-'
+                f'{path}-{duration * 1000:.0f}ms.prof')
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+
+
+class ServerTimingMixin:
+    """ Добавляет в Server-Timing время аутентификации, проверки прав,
+    сериализации и рендеринга ответа вьюсета. """
+
+    def perform_authentication(self, request):
+        with server_timing(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with server_timing(request, 'permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with server_timing(request, 'permissions'):
+            super().check_object_permissions(request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self.request, 'server_timings', None) is None:
+            return serializer
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            with server_timing(self.request, 'serialize'):
+                return to_representation(instance)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        timings = getattr(request, 'server_timings', None)
+        if timings is not None and hasattr(
+                response, 'add_post_render_callback'):
+            started = time.perf_counter()
+
+            def record_render(response):
+                timings['render'] = time.perf_counter() - started
+
+            response.add_post_render_callback(record_render)
+        return response
@@ -0,0 +1,30 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """ JSONRenderer на orjson.
+
+    Для данных из строк, чисел, списков и словарей ответ совпадает с
+    ответом JSONRenderer побайтово. Даты, Decimal и другие типы, которые
+    JSONRenderer кодирует по-своему, и ответы с отступами рендерит
+    JSONRenderer.
+    """
+
+    options = (orjson.OPT_PASSTHROUGH_DATETIME
+               | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(
+                accepted_media_type, renderer_context or {}) is not None:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=self.options)
+        except TypeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк, которые
+        # не допускаются в JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029')
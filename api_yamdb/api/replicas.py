@@ -0,0 +1,123 @@
+""" Чтение из реплик базы данных.
+
+Реплики перечислены в DATABASE_REPLICAS. Безопасные запросы к вьюсетам
+с ReplicaReadMixin читают данные из одной реплики, выбранной на время
+запроса, все остальные запросы и записи работают с основной базой.
+После изменения данных пользователь и измененные ресурсы на
+REPLICA_PIN_SECONDS закрепляются за основной базой, чтобы пользователь
+видел свои изменения, а ответы не кэшировались из отстающей реплики.
+Клиент закрепляется еще и cookie, которая не зависит от того, какой
+процесс обработает следующий запрос.
+"""
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .authentication import user_resource
+from .cache import is_pinned, pin_to_primary
+
+PIN_COOKIE = 'primary_until'
+
+_state = threading.local()
+_counter = itertools.count()
+_last_used = {}
+_lock = threading.Lock()
+
+
+def choose_replica():
+    """ Выбирает реплику по кругу или ту, что дольше всех не
+    использовалась (REPLICA_SELECTION = 'least_recently_used'). """
+
+    aliases = settings.DATABASE_REPLICAS
+    if not aliases:
+        return None
+    if settings.REPLICA_SELECTION == 'least_recently_used':
+        with _lock:
+            alias = min(aliases, key=lambda alias: _last_used.get(alias, 0))
+            _last_used[alias] = time.monotonic()
+        return alias
+    return aliases[next(_counter) % len(aliases)]
+
+
+def route_reads(alias):
+    """ Направляет чтение текущего потока в реплику alias, None
+    возвращает его в основную базу. """
+
+    _state.alias = alias
+
+
+def pinned_by_cookie(request):
+    """ Проверяет, что клиент недавно изменял данные. """
+
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def set_pin_cookie(response):
+    """ Закрепляет клиента за основной базой на REPLICA_PIN_SECONDS. """
+
+    if settings.DATABASE_REPLICAS:
+        seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(
+            PIN_COOKIE, str(time.time() + seconds), max_age=seconds,
+            httponly=True, samesite='Lax')
+
+
+class ReplicaRouter:
+    """ Роутер, который отправляет чтение в выбранную для запроса
+    реплику, а запись всегда в основную базу. """
+
+    def db_for_read(self, model, **hints):
+        alias = getattr(_state, 'alias', None)
+        # Внутри транзакции читаем то, что в ней уже записано.
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Объекты, прочитанные из реплики, сохраняются в основную базу.
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """ Выполняет безопасные запросы к вьюсету на реплике, если ни
+    пользователь, ни ресурсы из cache_resources недавно не изменялись. """
+
+    def get_primary_resources(self, request):
+        resources = list(getattr(self, 'cache_resources', ()))
+        if request.user.is_authenticated:
+            resources.append(user_resource(request.user.pk))
+        return resources
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS
+                and not pinned_by_cookie(request)
+                and not is_pinned(self.get_primary_resources(request))):
+            route_reads(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        route_reads(None)
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            set_pin_cookie(response)
+            if request.user.is_authenticated:
+                pin_to_primary(user_resource(request.user.pk))
+        return super().finalize_response(
+            request, response, *args, **kwargs)
@@ -1,10 +1,23 @@
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 from rest_framework.validators import UniqueValidator
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.trending import current_score
 from users.models import User
 
+from .sparse import SparseFieldsMixin
+
+# Имена скрытых пользователей заняты, пока команда purge_deleted не удалит
+# их, поэтому уникальность проверяется по всем пользователям.
+USERNAME_VALIDATORS = (
+    User.username_validator,
+    UniqueValidator(
+        queryset=User.all_objects.all(),
+        message=User._meta.get_field('username').error_messages['unique']),
+)
+
 
 class CategorySerializer(serializers.ModelSerializer):
     """ Сериализатор для работы с категориями произведений. """
@@ -48,39 +61,75 @@ class CreateTitleSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
 
-class ReadTitleSerializer(serializers.ModelSerializer):
+class BulkTitleSerializer(serializers.ModelSerializer):
+    """ Сериализатор для проверки произведения при пакетном создании.
+    Слаги категории и жанров проверяются сразу для всего пакета. """
+
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
+
+# Жанры произведения выводятся по названию, одинаково в сериализаторе и в
+# быстром пути списка произведений.
+GENRE_ORDERING = ('name', 'id')
+TITLE_GENRES = Prefetch('genre', queryset=Genre.objects.order_by(
+    *GENRE_ORDERING))
+
+
+class ReadTitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Сериализатор для чтения произведений. """
 
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
-    rating = serializers.SerializerMethodField(method_name='get_rating')
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
-                  'category')
+                  'category', 'reviews_count')
+        expandable_fields = ('reviews_count',)
+        field_columns = {'category': ('category__name', 'category__slug')}
+        field_prefetches = {'genre': (TITLE_GENRES,)}
 
-    @staticmethod
-    def get_rating(obj):
-        """ Метод для просчитывания рейтинга произведений. """
 
-        reviews = Review.objects.filter(title_id=obj.id)
-        scores_for_title = (
-            title.score for title
-            in reviews
-        )
-        if reviews:
-            return sum(scores_for_title) / reviews.count()
-        return None
+class TrendingTitleSerializer(serializers.Serializer):
+    """ Сериализатор для списка популярных произведений. """
 
+    id = serializers.IntegerField(source='title.id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+    rating = serializers.FloatField(source='title.rating')
+    category = CategorySerializer(source='title.category')
+    score = serializers.SerializerMethodField()
 
-class UserSerializer(serializers.ModelSerializer):
+    def get_score(self, obj):
+        return round(current_score(obj.log_score, self.context.get('now')),
+                     3)
+
+
+class ActivitySerializer(serializers.Serializer):
+    """ Сериализатор записей ленты активности пользователя. Поля score и
+    review выводятся только у отзывов и только у комментариев. """
+
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title = serializers.IntegerField(source='title_id')
+    review = serializers.IntegerField(source='review_id', required=False)
+    text = serializers.CharField()
+    score = serializers.IntegerField(required=False)
+    pub_date = serializers.DateTimeField()
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Сериализатор для работы с пользователями через права админа. """
 
     # Переопределяем почту, чтобы проверять уникальность значений.
     email = serializers.EmailField(
         validators=[UniqueValidator(
-            queryset=User.objects.all(),
+            queryset=User.all_objects.all(),
             message='Пользователь с такой почтой уже существует.')]
     )
 
@@ -89,6 +138,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = (
             'username', 'email', 'first_name', 'last_name', 'bio', 'role',
         )
+        extra_kwargs = {'username': {'validators': USERNAME_VALIDATORS}}
 
 
 class SelfUserSerializer(serializers.ModelSerializer):
@@ -109,11 +159,12 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     регистрации через токен. """
 
     email = serializers.EmailField(
-        validators=[UniqueValidator(queryset=User.objects.all())])
+        validators=[UniqueValidator(queryset=User.all_objects.all())])
 
     class Meta:
         model = User
         fields = ('username', 'email')
+        extra_kwargs = {'username': {'validators': USERNAME_VALIDATORS}}
 
     def validate(self, data):
         # Проверяем, что username не является me
@@ -131,7 +182,22 @@ class ObtainUserTokenSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """ Сериализатор для работы с комментариями пользователей к отзывам. """
+
+    author = serializers.SlugRelatedField(
+        read_only=True,
+        slug_field='username',
+        default=serializers.CurrentUserDefault()
+    )
+
+    class Meta:
+        model = Comment
+        fields = ('id', 'text', 'author', 'pub_date')
+        field_columns = {'author': ('author__username',)}
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """ Сериализатор для работы с отзывами пользователей по произведениям. """
 
     author = serializers.SlugRelatedField(
@@ -139,6 +205,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         slug_field='username',
         default=serializers.CurrentUserDefault()
     )
+    comments = CommentSerializer(many=True, read_only=True)
 
     def validate(self, data):
         request = self.context.get('request')
@@ -158,18 +225,10 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date',)
-
-
-class CommentSerializer(serializers.ModelSerializer):
-    """ Сериализатор для работы с комментариями пользователей к отзывам. """
-
-    author = serializers.SlugRelatedField(
-        read_only=True,
-        slug_field='username',
-        default=serializers.CurrentUserDefault()
-    )
-
-    class Meta:
-        model = Comment
-        fields = ('id', 'text', 'author', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count', 'comments')
+        expandable_fields = ('comments',)
+        field_columns = {'author': ('author__username',)}
+        field_prefetches = {'comments': (Prefetch(
+            'comments', queryset=Comment.objects.filter(
+                author__deleted_at__isnull=True).select_related('author')),)}
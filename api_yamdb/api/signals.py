@@ -0,0 +1,46 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+from users.models import User
+
+from .authentication import user_resource
+from .cache import bump_versions_on_commit
+
+# Ресурсы кэша ответов, которые меняются при изменении моделей.
+# Отзывы меняют рейтинг произведений.
+MODEL_RESOURCES = {
+    Category: ('categories',),
+    Genre: ('genres',),
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def reset_response_cache(sender, **kwargs):
+    """ Сбрасывает кэш ответов после изменения модели. """
+
+    resources = MODEL_RESOURCES.get(sender)
+    if resources and not kwargs.get('raw'):
+        bump_versions_on_commit(*resources)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def reset_titles_cache(sender, action, **kwargs):
+    """ Сбрасывает кэш произведений после изменения их жанров. """
+
+    if action.startswith('post_'):
+        bump_versions_on_commit('titles')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_cache(sender, instance, **kwargs):
+    """ Сбрасывает закэшированного для аутентификации пользователя, а
+    после его скрытия — и ресурсы с его отзывами и комментариями. """
+
+    bump_versions_on_commit(user_resource(instance.pk))
+    if 'deleted_at' in (kwargs.get('update_fields') or ()):
+        bump_versions_on_commit('titles', 'reviews', 'comments')
@@ -0,0 +1,93 @@
+from django.http import QueryDict
+from rest_framework.permissions import SAFE_METHODS
+
+
+def split_param(query_params, name):
+    """ Значения параметра запроса, перечисленные через запятую. """
+
+    return [value.strip() for item in query_params.getlist(name)
+            for value in item.split(',') if value.strip()]
+
+
+class SparseFieldsMixin:
+    """ Оставляет в ответе на GET-запрос только поля из параметра fields
+    и убирает поля из omit. Поля из Meta.expandable_fields выводятся
+    только по запросу в expand или fields.
+
+    prune_queryset убирает из запроса колонки и связи, которые нужны
+    только выброшенным полям. Meta.field_columns задает колонки полей,
+    не совпадающих с колонками модели, Meta.field_prefetches — связи
+    для prefetch_related.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Вложенные сериализаторы создаются без контекста и, как ответы
+        # на запись, выводят поля по умолчанию.
+        request = self._context.get('request')
+        query_params = QueryDict()
+        if request is not None and request.method in SAFE_METHODS:
+            query_params = request.query_params
+        requested = self.requested_fields(query_params)
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        expandable = getattr(cls.Meta, 'expandable_fields', ())
+        only = split_param(query_params, 'fields')
+        expand = split_param(query_params, 'expand')
+        omit = split_param(query_params, 'omit')
+        return [
+            name for name in cls.Meta.fields
+            if name not in omit
+            and (name in only if only
+                 else name not in expandable or name in expand)
+        ]
+
+    @classmethod
+    def prune_queryset(cls, queryset, query_params, columns=()):
+        """ Загружает только колонки и связи запрошенных полей и
+        дополнительные колонки columns. """
+
+        meta = cls.Meta.model._meta
+        field_columns = getattr(cls.Meta, 'field_columns', {})
+        field_prefetches = getattr(cls.Meta, 'field_prefetches', {})
+        model_columns = {field.name for field in meta.concrete_fields}
+        # Менеджер связанных объектов проставляет загруженным объектам
+        # родителя по внешнему ключу, поэтому ключ нужно загрузить.
+        columns = [meta.pk.name, *columns, *(
+            field.name for field in queryset._known_related_objects)]
+        prefetches = []
+        for name in cls.requested_fields(query_params):
+            if name in field_prefetches:
+                prefetches.extend(field_prefetches[name])
+            elif name in field_columns:
+                columns.extend(field_columns[name])
+            elif name in model_columns:
+                columns.append(name)
+        relations = {column.rsplit('__', 1)[0] for column in columns
+                     if '__' in column}
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*columns, *relations).prefetch_related(
+            *prefetches)
+
+
+class PrunedQuerysetMixin:
+    """ Загружает для GET-запросов к вьюсету только колонки и связи
+    полей, запрошенных у сериализатора с SparseFieldsMixin. """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if (self.request.method not in SAFE_METHODS
+                or not issubclass(serializer_class, SparseFieldsMixin)):
+            return queryset
+        # Курсорная пагинация читает из объектов поля сортировки.
+        ordering = [field.lstrip('-')
+                    for field in getattr(self.paginator, 'ordering', ())]
+        return serializer_class.prune_queryset(
+            queryset, self.request.query_params, ordering)
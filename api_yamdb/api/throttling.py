@@ -0,0 +1,160 @@
+""" Ограничение частоты запросов корзинами токенов в общем кэше.
+
+Корзина вмещает num_requests токенов и пополняется со скоростью
+num_requests за период из частоты вида '10/hour'. В кэше хранится момент,
+когда корзина снова станет полной (TAT алгоритма GCRA): каждый запрос
+атомарно сдвигает его incr на интервал пополнения, поэтому конкурентные
+запросы всех процессов не могут взять больше токенов, чем есть в корзине.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def take_token(key, capacity, period):
+    """ Берет токен из корзины key. Возвращает 0, если токен взят, иначе
+    через сколько секунд появится следующий. """
+
+    interval = max(1, period * 1000 // capacity)
+    limit = interval * capacity
+    now = int(time.time() * 1000)
+    # Ключ истекает, когда корзина уже полная.
+    timeout = math.ceil(limit / 1000) + 1
+    if cache.add(key, now + interval, timeout):
+        return 0
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        cache.set(key, now + interval, timeout)
+        return 0
+    if full_at - interval < now:
+        # Корзина была полной, отсчет начинается с текущего момента.
+        # Одновременные запросы к полной корзине могут получить по
+        # лишнему токену, но не больше.
+        cache.set(key, now + interval, timeout)
+        return 0
+    if full_at - now > limit:
+        cache.decr(key, interval)
+        return (full_at - now - limit) / 1000
+    cache.touch(key, timeout)
+    return 0
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """ Системная проверка: корзины в LocMemCache не ограничивают запросы
+    к нескольким процессам, поэтому без THROTTLE_LOCAL_CACHE нужен общий
+    кэш. Без него корзины работают в пределах процесса. """
+
+    backend = settings.CACHES['default']['BACKEND']
+    if 'locmem' in backend.lower() and not settings.THROTTLE_LOCAL_CACHE:
+        return [checks.Warning(
+            'Корзины троттлинга хранятся в LocMemCache и не общие для '
+            'процессов сервера.',
+            hint='Задайте CACHE_BACKEND, например memcached, или '
+                 'THROTTLE_LOCAL_CACHE=1 для одного процесса.',
+            id='api.W001')]
+    return []
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = math.ceil(wait)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """ Базовый троттлинг по корзине токенов. Область выбирается по
+    запросу в get_scope, частота — по области из
+    DEFAULT_THROTTLE_RATES, без частоты запрос не ограничивается. """
+
+    cache_format = 'api:throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # Область и частота известны только в allow_request.
+        self.retry_after = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        self.rate = self.scope and self.get_rate()
+        if not self.rate:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.retry_after = take_token(
+            self.key, self.num_requests, self.duration)
+        if self.retry_after:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class ScopedIPThrottle(TokenBucketThrottle):
+    """ Корзина для каждого IP-адреса в области throttle_scope вью. """
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class ScopedUsernameThrottle(TokenBucketThrottle):
+    """ Корзина для каждого имени пользователя из тела запроса в области
+    throttle_scope вью с частотой <scope>_username. Ограничивает перебор
+    кода подтверждения и письма одному пользователю с любых адресов. """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        return scope and f'{scope}_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(
+            request.data, 'get') else None
+        if not username:
+            return None
+        ident = hashlib.md5(str(username).lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoadSheddingThrottle(TokenBucketThrottle):
+    """ Общая корзина анонимного чтения. Когда она пуста, сервер
+    перегружен: анонимные запросы на чтение получают 503 до обращений к
+    базе, а запросы пользователей и запись продолжают обслуживаться. """
+
+    scope = 'anon_read'
+
+    def get_scope(self, request, view):
+        if (request.method in SAFE_METHODS
+                and not request.user.is_authenticated):
+            return self.scope
+        return None
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+    def throttle_failure(self):
+        raise Overloaded(self.retry_after)
@@ -3,8 +3,9 @@ from django.urls import include, path
 from django.views.generic import TemplateView
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, GenreViewSet, ObtainUserToken,
-                    RegisterUser, TitleViewSet, UserViewSet)
+from .views import (CacheStatsView, CatalogueExportView, CategoryViewSet,
+                    GenreViewSet, ObtainUserToken, RegisterUser, TitleViewSet,
+                    UserViewSet)
 
 app_name = 'api'
 
@@ -26,6 +27,9 @@ v1_urlpatterns = (
     [
         path('redoc/', TemplateView.as_view(template_name='redoc.html'),
              name='redoc'),
+        path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+        path('titles/export/', CatalogueExportView.as_view(),
+             name='titles-export'),
         path('', include(router_v1.urls)),
 
     ],
@@ -0,0 +1,45 @@
+from django.conf import settings
+from rest_framework.response import Response
+
+from .profiling import server_timing
+from .renderers import FastJSONRenderer
+
+# Параметры запроса, с которыми список строит сериализатор.
+SERIALIZER_PARAMS = ('fields', 'omit', 'expand')
+
+
+class ValuesListMixin:
+    """ Быстрый путь для списка объектов вьюсета.
+
+    Строки выбираются через values() с колонками values_fields и
+    собираются в ответ методом represent_rows без сериализатора, а ответ
+    рендерит orjson. Ответ должен совпадать с ответом serializer_class
+    побайтово. Быстрый путь отключается настройкой FAST_LIST_RESPONSES.
+    """
+
+    values_fields = ()
+
+    def get_renderers(self):
+        if self.use_values_list(self.request):
+            return [FastJSONRenderer(), *super().get_renderers()]
+        return super().get_renderers()
+
+    def use_values_list(self, request):
+        return (self.action == 'list' and settings.FAST_LIST_RESPONSES
+                and not any(param in request.query_params
+                            for param in SERIALIZER_PARAMS))
+
+    def represent_rows(self, rows):
+        return list(rows)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_values_list(request):
+            return super().list(request, *args, **kwargs)
+        rows = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None).values(*self.values_fields)
+        page = self.paginate_queryset(rows)
+        with server_timing(request, 'serialize'):
+            data = self.represent_rows(rows if page is None else page)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
@@ -1,25 +1,43 @@
 import random
+from collections import defaultdict
 
 from django.core.exceptions import PermissionDenied
-from django.core.mail import send_mail
+from django.db import connection, transaction
+from django.db.models.functions import Coalesce, Greatest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import CreateAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title
-from users.models import User
-
-from .filters import TitleFilter
-from .permissions import IsAdminOrReadOnly, IsCustomAdminUser, IsUserOrAdmin
-from .serializers import (CategorySerializer, CommentSerializer,
-                          CreateTitleSerializer, GenreSerializer,
-                          ObtainUserTokenSerializer, ReadTitleSerializer,
-                          ReviewSerializer, SelfUserSerializer,
+from reviews.export import FORMATS, export_lines
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.trending import top_trending
+from users.models import OutgoingEmail, User
+
+from .cache import (CachedListMixin, CachedRetrieveMixin,
+                    bump_versions_on_commit, get_stats, single_bump)
+from .conditional import ConditionalGetMixin
+from .filters import TitleFilter, TitleOrderingFilter
+from .pagination import ActivityCursorPagination, PubDateCursorPagination
+from .permissions import (IsAdminOrReadOnly, IsCustomAdminUser,
+                          IsModeratorOrAdmin, IsUserOrAdmin)
+from .profiling import ServerTimingMixin
+from .replicas import ReplicaReadMixin
+from .serializers import (GENRE_ORDERING, TITLE_GENRES, ActivitySerializer,
+                          BulkTitleSerializer, CategorySerializer,
+                          CommentSerializer, CreateTitleSerializer,
+                          GenreSerializer, ObtainUserTokenSerializer,
+                          ReadTitleSerializer, ReviewSerializer,
+                          SelfUserSerializer, TrendingTitleSerializer,
                           UserRegisterSerializer, UserSerializer)
+from .sparse import PrunedQuerysetMixin
+from .values import ValuesListMixin
 
 
 class CreateListDestroyViewSet(mixins.CreateModelMixin,
@@ -31,9 +49,12 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     pass
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(ServerTimingMixin, ReplicaReadMixin, CachedListMixin,
+                      ValuesListMixin, CreateListDestroyViewSet):
     """ Вью сет для взаимодействия с категориями. """
 
+    cache_resources = ('categories',)
+    values_fields = ('name', 'slug')
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -42,9 +63,12 @@ class CategoryViewSet(CreateListDestroyViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(ServerTimingMixin, ReplicaReadMixin, CachedListMixin,
+                   ValuesListMixin, CreateListDestroyViewSet):
     """ Вью сет для взаимодействия с жанрами. """
 
+    cache_resources = ('genres',)
+    values_fields = ('name', 'slug')
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -53,21 +77,177 @@ class GenreViewSet(CreateListDestroyViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ServerTimingMixin, ReplicaReadMixin, ConditionalGetMixin,
+                   CachedListMixin, CachedRetrieveMixin, ValuesListMixin,
+                   PrunedQuerysetMixin, viewsets.ModelViewSet):
     """ Вью сет для взаимодействия с произведениями. """
 
-    queryset = Title.objects.all()
+    cache_resources = ('titles', 'categories', 'genres')
+    queryset = Title.objects.select_related('category').prefetch_related(
+        TITLE_GENRES)
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'reviews_count', 'year', 'name')
+    values_fields = ('id', 'name', 'year', 'rating', 'description',
+                     'category_id', 'category__name', 'category__slug')
+
+    def represent_rows(self, rows):
+        """ Собирает произведения в формате ReadTitleSerializer. Жанры
+        всех произведений страницы выбираются одним запросом. """
+
+        rows = list(rows)
+        genres = defaultdict(list)
+        for title_id, name, slug in GenreTitle.objects.filter(
+            title_id__in=[row['id'] for row in rows],
+        ).order_by(*(f'genre__{field}' for field in GENRE_ORDERING)
+                   ).values_list('title_id', 'genre__name', 'genre__slug'):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return [{
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'rating': row['rating'],
+            'description': row['description'],
+            'genre': genres[row['id']],
+            'category': None if row['category_id'] is None else {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            },
+        } for row in rows]
+
+    def get_object_last_modified(self):
+        return Title.objects.filter(pk=self.kwargs.get('pk')).values_list(
+            'updated_at', flat=True).first()
+
+    # Наибольшее количество произведений в одном запросе к /titles/bulk/.
+    bulk_max_size = 10000
+    bulk_batch_size = 1000
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return ReadTitleSerializer
         return CreateTitleSerializer
 
-
-class UserViewSet(viewsets.ModelViewSet):
+    def perform_destroy(self, instance):
+        # Отзывы и комментарии удаляет пачками команда purge_deleted.
+        instance.soft_delete()
+
+    # Размер списка популярных произведений по умолчанию и наибольший.
+    trending_limit = 10
+    trending_max_limit = 100
+
+    @action(detail=False, url_path='trending', url_name='trending')
+    def trending(self, request):
+        """ Самые популярные за последнее время произведения. Список
+        можно ограничить категорией и жанром по слагу. """
+
+        limit = request.query_params.get('limit', str(self.trending_limit))
+        if not (limit.isdigit()
+                and 0 < int(limit) <= self.trending_max_limit):
+            return Response(
+                {'detail': f'limit должен быть от 1 до '
+                           f'{self.trending_max_limit}.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        titles = top_trending(int(limit),
+                              request.query_params.get('category'),
+                              request.query_params.get('genre'))
+        serializer = TrendingTitleSerializer(
+            titles, many=True, context={'now': timezone.now()})
+        return Response(serializer.data)
+
+    @action(detail=False, methods=('POST',), url_path='bulk',
+            url_name='bulk')
+    def bulk(self, request):
+        """ Создает произведения из списка. Корректные произведения
+        сохраняются, для остальных возвращаются ошибки с их индексом. """
+
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Ожидается список произведений.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not request.data:
+            return Response({'created': [], 'errors': []},
+                            status=status.HTTP_200_OK)
+        if len(request.data) > self.bulk_max_size:
+            return Response(
+                {'detail': f'Можно создать не более {self.bulk_max_size} '
+                           f'произведений за один запрос.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        items, errors = self.validate_bulk(request.data)
+        self.create_titles(items)
+        return Response(
+            {'created': [{'index': index, 'id': title.pk}
+                         for index, title, _ in items],
+             'errors': errors},
+            status=(status.HTTP_201_CREATED if items
+                    else status.HTTP_400_BAD_REQUEST))
+
+    def validate_bulk(self, data):
+        """ Проверяет произведения и одним запросом на каждую связь
+        находит их категории и жанры. Возвращает список кортежей
+        (индекс, произведение, id жанров) и список ошибок. """
+
+        valid, errors = [], []
+        for index, item in enumerate(data):
+            serializer = BulkTitleSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        categories = dict(Category.objects.filter(
+            slug__in={item['category'] for _, item in valid},
+        ).values_list('slug', 'pk'))
+        genres = dict(Genre.objects.filter(
+            slug__in={slug for _, item in valid for slug in item['genre']},
+        ).values_list('slug', 'pk'))
+
+        items = []
+        for index, item in valid:
+            item_errors = {}
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    f'Категория {item["category"]} не найдена.']
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    f'Жанр {slug} не найден.' for slug in missing]
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+                continue
+            title = Title(name=item['name'], year=item['year'],
+                          description=item.get('description'),
+                          category_id=categories[item['category']])
+            genre_ids = {genres[slug] for slug in item['genre']}
+            items.append((index, title, genre_ids))
+        errors.sort(key=lambda error: error['index'])
+        return items, errors
+
+    @transaction.atomic
+    def create_titles(self, items):
+        """ Сохраняет произведения и их жанры пачками. """
+
+        titles = [title for _, title, _ in items]
+        # Сигналы сохранения каждого произведения не сбрасывают кэш,
+        # произведения сбрасываются один раз после сохранения всех.
+        with single_bump():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(
+                    titles, batch_size=self.bulk_batch_size)
+            else:
+                # Без RETURNING первичные ключи новых строк неизвестны,
+                # поэтому произведения сохраняются по одному.
+                for title in titles:
+                    title.save()
+            GenreTitle.objects.bulk_create(
+                [GenreTitle(title_id=title.pk, genre_id=genre_id)
+                 for _, title, genre_ids in items for genre_id in genre_ids],
+                batch_size=self.bulk_batch_size)
+            # bulk_create не вызывает сигналы, сбрасывающие кэш.
+            bump_versions_on_commit('titles')
+
+
+class UserViewSet(ServerTimingMixin, ReplicaReadMixin, PrunedQuerysetMixin,
+                  viewsets.ModelViewSet):
     """ Вью сет для взаимодействия с пользователями с помощью админа. """
 
     serializer_class = UserSerializer
@@ -78,6 +258,10 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     queryset = User.objects.all()
 
+    def perform_destroy(self, instance):
+        # Отзывы и комментарии удаляет пачками команда purge_deleted.
+        instance.soft_delete()
+
     @action(detail=False, url_path='me', url_name='me',
             methods=('GET', 'PATCH'), permission_classes=[IsUserOrAdmin])
     def get_me(self, request, *args, **kwargs):
@@ -92,11 +276,76 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, url_path='activity', url_name='activity',
+            permission_classes=(IsModeratorOrAdmin,))
+    def activity(self, request, *args, **kwargs):
+        """ Лента отзывов и комментариев пользователя для модераторов. """
+
+        return self.activity_response(request, self.get_object())
+
+    @action(detail=False, url_path='me/activity', url_name='me-activity',
+            permission_classes=(permissions.IsAuthenticated,))
+    def get_me_activity(self, request, *args, **kwargs):
+        """ Метод для обработки запросов к /me/activity/ """
+
+        return self.activity_response(request, request.user)
+
+    @staticmethod
+    def activity_response(request, user):
+        paginator = ActivityCursorPagination()
+        page = paginator.paginate_activity(request, user)
+        return paginator.get_paginated_response(
+            ActivitySerializer(page, many=True).data)
+
+
+class CacheStatsView(APIView):
+    """ Вью для просмотра счетчиков кэша ответов. """
+
+    permission_classes = (permissions.IsAuthenticated, IsCustomAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_stats())
+
+
+class CatalogueExportView(APIView):
+    """ Вью для потоковой выгрузки каталога произведений в NDJSON или CSV.
+
+    Параметры запроса: output (ndjson или csv), after — id последнего
+    полученного произведения для продолжения выгрузки, reviews и
+    comments — добавить отзывы и комментарии.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, IsCustomAdminUser,)
+    content_types = {
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        after = request.query_params.get('after', '0')
+        if output not in FORMATS or not after.isdigit():
+            return Response(
+                {'detail': f'output должен быть одним из {FORMATS}, '
+                           f'after — неотрицательным числом.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        flags = {
+            name: request.query_params.get(name) in ('1', 'true')
+            for name in ('reviews', 'comments')
+        }
+        response = StreamingHttpResponse(
+            export_lines(output, int(after), **flags),
+            content_type=self.content_types[output])
+        response['Content-Disposition'] = (
+            f'attachment; filename="titles.{output}"')
+        return response
+
 
 class RegisterUser(CreateAPIView):
     """ Вью для самостоятельной регистрации пользователей. """
 
     permission_classes = (permissions.AllowAny,)
+    throttle_scope = 'signup'
 
     def post(self, request, *args, **kwargs):
         serializer = UserRegisterSerializer(data=request.data)
@@ -105,13 +354,11 @@ class RegisterUser(CreateAPIView):
             confirmation_code = random.randint(10000, 99999)
             User.objects.get_or_create(**serializer.validated_data,
                                        confirmation_code=confirmation_code)
-            # Отправляем код на почту пользователя
-            send_mail(
-                'Confirmation code',
-                f'Your confirmation code is {confirmation_code}',
-                None,
-                [serializer.validated_data.get('email')],
-                fail_silently=False,
+            # Ставим письмо с кодом в очередь, его отправит send_emails
+            OutgoingEmail.objects.create(
+                recipient=serializer.validated_data.get('email'),
+                subject='Confirmation code',
+                body=f'Your confirmation code is {confirmation_code}',
             )
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -121,6 +368,7 @@ class ObtainUserToken(CreateAPIView):
     """ Вью для получения JWT токена пользователем. """
 
     permission_classes = (permissions.AllowAny,)
+    throttle_scope = 'token'
 
     def post(self, request, *args, **kwargs):
         serializer = ObtainUserTokenSerializer(data=request.data)
@@ -136,26 +384,59 @@ class ObtainUserToken(CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ServerTimingMixin, ReplicaReadMixin, ConditionalGetMixin,
+                    PrunedQuerysetMixin, viewsets.ModelViewSet):
     """ Вью сет для взаимодействия с отзывами пользователей. """
 
     permission_classes = (IsAuthenticatedOrReadOnly,)
     serializer_class = ReviewSerializer
 
+    @property
+    def paginator(self):
+        """ По запросу клиента заменяет limit/offset на курсорную
+        пагинацию по дате публикации. """
+
+        if not hasattr(self, '_paginator'):
+            if PubDateCursorPagination.is_requested(self.request):
+                self._paginator = PubDateCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
+    def get_list_last_modified(self):
+        return Title.objects.filter(
+            pk=self.kwargs.get('title_id'),
+        ).values_list(
+            Coalesce('reviews_updated_at', 'updated_at'), flat=True).first()
+
+    def get_object_last_modified(self):
+        # Отзыв выводится с количеством комментариев.
+        return Review.objects.visible().filter(
+            pk=self.kwargs.get('pk'), title__pk=self.kwargs.get('title_id'),
+        ).values_list(Greatest(
+            'updated_at', Coalesce('comments_updated_at', 'updated_at'),
+        ), flat=True).first()
+
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.filter(
+            author__deleted_at__isnull=True).select_related('author')
 
+    # Изменение отзыва и агрегатов рейтинга произведения
+    # выполняются в одной транзакции.
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
+    @transaction.atomic
     def perform_update(self, serializer):
         if serializer.instance.author != self.request.user:
             raise PermissionDenied('Изменить не свой отзыв нельзя')
         super(ReviewViewSet, self).perform_update(serializer)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
         if not (instance.author == self.request.user
                 or self.request.user.role == 'moderator'):
@@ -170,13 +451,32 @@ class CommentViewSet(ReviewViewSet):
 
     def get_review(self):
         return get_object_or_404(
-            Review,
+            Review.objects.visible(),
             pk=self.kwargs.get('review_id'),
             title__pk=self.kwargs.get('title_id')
         )
 
+    def get_list_last_modified(self):
+        return Review.objects.visible().filter(
+            pk=self.kwargs.get('review_id'),
+            title__pk=self.kwargs.get('title_id'),
+        ).values_list(
+            Coalesce('comments_updated_at', 'updated_at'), flat=True).first()
+
+    def get_object_last_modified(self):
+        return Comment.objects.filter(
+            author__deleted_at__isnull=True,
+            pk=self.kwargs.get('pk'),
+            review__pk=self.kwargs.get('review_id'),
+            review__title__pk=self.kwargs.get('title_id'),
+        ).values_list('updated_at', flat=True).first()
+
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.filter(
+            author__deleted_at__isnull=True).select_related('author')
 
+    # Комментарий и количество комментариев отзыва изменяются в одной
+    # транзакции.
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
@@ -3,6 +3,14 @@ from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+
+def env_flag(name):
+    """ Логическая переменная окружения: включена значениями 1, true и
+    yes, а пустая строка, 0 и false ее выключают. """
+
+    return os.getenv(name, default='').lower() in ('1', 'true', 'yes')
+
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 SECRET_KEY = os.getenv(
@@ -29,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,12 +78,86 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default="postgres"),
         'HOST': os.getenv('DB_HOST', default="localhost"),
         'PORT': os.getenv('DB_PORT', default="5432"),
-    } if not os.getenv('USE_SQLITE', default=False) else {
+        # Потоки gunicorn держат открытыми свои соединения с БД между
+        # запросами, а не подключаются заново на каждый запрос.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+    } if not env_flag('USE_SQLITE') else {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv('SQLITE_PATH',
+                          default=os.path.join(BASE_DIR, 'db.sqlite3')),
     }
 }
 
+# Реплики основной базы только для чтения: хосты PostgreSQL или файлы
+# SQLite через запятую. Безопасные запросы к API читают из реплик, после
+# изменения данных пользователь и измененные ресурсы на
+# REPLICA_PIN_SECONDS секунд закрепляются за основной базой.
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[DATABASE_REPLICAS[-1]] = dict(
+        DATABASES['default'], TEST={'MIRROR': 'default'},
+        **{('NAME' if env_flag('USE_SQLITE') else 'HOST'):
+           location.strip()})
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# round_robin или least_recently_used.
+REPLICA_SELECTION = os.getenv('REPLICA_SELECTION', default='round_robin')
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+
+# Версии ответов, закрепление за основной базой и корзины троттлинга
+# должны быть общими для всех процессов, поэтому в docker-compose кэш
+# хранится в memcached. LocMemCache по умолчанию подходит только для
+# разработки и тестов в одном процессе.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+# Корзины троттлинга в LocMemCache у каждого процесса свои, поэтому вне
+# DEBUG системная проверка api.W001 предупреждает о них.
+# THROTTLE_LOCAL_CACHE подтверждает, что сервер работает в одном процессе.
+THROTTLE_LOCAL_CACHE = DEBUG or env_flag('THROTTLE_LOCAL_CACHE')
+
+# Время жизни закэшированных ответов API в секундах. Изменения данных
+# сбрасывают кэш сразу, таймаут ограничивает только размер кэша.
+API_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни пользователя, закэшированного при JWT аутентификации.
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
+# Период полураспада вклада отзыва в популярность произведения в
+# секундах. После изменения нужно пересчитать популярность командой
+# update_trending --rebuild.
+TRENDING_HALF_LIFE = 60 * 60 * 24 * 2
+
+# Списки произведений, жанров и категорий собираются из values() без
+# сериализаторов и рендерятся orjson.
+FAST_LIST_RESPONSES = not env_flag('DISABLE_FAST_LIST_RESPONSES')
+
+# Сжатие ответов: ответы меньше COMPRESSION_MIN_SIZE байт не сжимаются,
+# уровни сжатия подобраны для ответов, которые сжимаются на лету.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Профилирование запросов. SERVER_TIMING добавляет в ответы заголовок
+# Server-Timing, PROFILING_SAMPLE_RATE задает долю запросов, которые
+# выполняются под cProfile, а запросы дольше PROFILING_SLOW_REQUEST
+# секунд записываются в лог api.profiling.
+SERVER_TIMING = env_flag('SERVER_TIMING')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0))
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_SLOW_REQUEST = (
+    float(os.getenv('PROFILING_SLOW_REQUEST'))
+    if os.getenv('PROFILING_SLOW_REQUEST') else None)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': ('django.contrib.auth.password_validation'
@@ -117,11 +201,34 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 100,
+    # Корзины токенов в кэше: signup и token — на IP-адрес и на имя
+    # пользователя, anon_read — общая для анонимного чтения, при ее
+    # исчерпании анонимные запросы получают 503, а пользователи и
+    # запись продолжают обслуживаться.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.LoadSheddingThrottle',
+        'api.throttling.ScopedIPThrottle',
+        'api.throttling.ScopedUsernameThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP', default='20/hour'),
+        'signup_username': os.getenv(
+            'THROTTLE_SIGNUP_USERNAME', default='5/hour'),
+        'token': os.getenv('THROTTLE_TOKEN', default='30/hour'),
+        'token_username': os.getenv(
+            'THROTTLE_TOKEN_USERNAME', default='10/hour'),
+        'anon_read': os.getenv('THROTTLE_ANON_READ', default='1000/s'),
+    },
+    # За nginx (NUM_PROXIES=1 в docker-compose) адрес клиента берется из
+    # X-Forwarded-For, который nginx перезаписывает. Без прокси заголовок
+    # задает сам клиент, поэтому по умолчанию используется REMOTE_ADDR:
+    # при None DRF тоже доверяет X-Forwarded-For, а при 0 — нет.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
 }
 
 SIMPLE_JWT = {
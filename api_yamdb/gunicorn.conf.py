@@ -0,0 +1,31 @@
+# Настройки gunicorn для образа web.
+#
+# Django 2.2 не поддерживает асинхронные представления и ORM, поэтому
+# параллельность обеспечивают потоки: воркер gthread держит открытыми
+# keep-alive соединения и обрабатывает запросы в пуле потоков, а
+# медленных клиентов буферизует nginx. Один процесс с несколькими
+# потоками обслуживает столько же одновременных запросов, сколько
+# несколько sync воркеров, но занимает меньше памяти.
+import multiprocessing
+import os
+
+# Версии ответов, закрепление за основной базой и корзины троттлинга
+# хранятся в кэше, поэтому несколько процессов возможны только с общим
+# кэшем. С LocMemCache по умолчанию сервер запускается с одним воркером.
+shared_cache = 'locmem' not in os.getenv('CACHE_BACKEND', 'locmem').lower()
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS',
+    min(4, multiprocessing.cpu_count()) if shared_cache else 1))
+if workers > 1 and not shared_cache:
+    raise RuntimeError(
+        'Несколько воркеров gunicorn требуют общего кэша: задайте '
+        'CACHE_BACKEND, например memcached, или GUNICORN_WORKERS=1.')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# Перезапуск воркеров ограничивает рост памяти при долгой работе.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
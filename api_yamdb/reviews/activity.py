@@ -0,0 +1,58 @@
+""" Лента активности пользователя: его отзывы и комментарии от новых к
+старым.
+
+Отзывы и комментарии читаются по индексам (author, -pub_date, -id) не
+больше чем на limit строк после позиции последней выданной записи, и
+результаты сливаются в один поток. Позиция — кортеж (pub_date, тип, id),
+при одинаковой дате отзывы идут раньше комментариев. Поэтому страница
+любой глубины стоит двух коротких чтений индексов без OFFSET и COUNT(*).
+"""
+import heapq
+from itertools import islice
+
+from django.db.models import F, Q
+
+from .models import Comment, Review
+
+REVIEW, COMMENT = 'review', 'comment'
+# Порядок типов записей с одинаковой датой публикации.
+KIND_ORDER = {REVIEW: 1, COMMENT: 0}
+
+
+def position_key(row):
+    return row['pub_date'], KIND_ORDER[row['type']], row['id']
+
+
+def after_position(queryset, kind, position):
+    """ Оставляет записи типа kind, которые идут в ленте после позиции
+    position. """
+
+    if position is None:
+        return queryset
+    pub_date, last_kind, last_id = position
+    condition = Q(pub_date__lt=pub_date)
+    if kind == last_kind:
+        condition |= Q(pub_date=pub_date, id__lt=last_id)
+    elif KIND_ORDER[kind] < KIND_ORDER[last_kind]:
+        condition |= Q(pub_date=pub_date)
+    return queryset.filter(condition)
+
+
+def user_activity(user, limit, position=None):
+    """ Возвращает не больше limit записей ленты пользователя после
+    позиции position. """
+
+    reviews = after_position(Review.objects.filter(
+        author=user, title__deleted_at__isnull=True,
+    ), REVIEW, position).order_by('-pub_date', '-id').values(
+        'id', 'pub_date', 'text', 'score', 'title_id')[:limit]
+    comments = after_position(Comment.objects.filter(
+        author=user, review__title__deleted_at__isnull=True,
+    ), COMMENT, position).order_by('-pub_date', '-id').values(
+        'id', 'pub_date', 'text', 'review_id',
+        title_id=F('review__title_id'))[:limit]
+    rows = heapq.merge(
+        ({**row, 'type': REVIEW} for row in reviews),
+        ({**row, 'type': COMMENT} for row in comments),
+        key=position_key, reverse=True)
+    return list(islice(rows, limit))
@@ -1,13 +1,16 @@
 from django.contrib import admin
+from users.admin import SoftDeleteAdminMixin
 
 from .models import Category, Comment, Genre, Review, Title
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """ Класс для управления произведениями в админке. """
 
-    list_display = ('pk', 'name', 'year', 'category', 'get_genres')
+    list_display = ('pk', 'name', 'year', 'category', 'get_genres',
+                    'rating', 'reviews_count')
+    readonly_fields = ('rating', 'reviews_count', 'score_sum')
     search_fields = ('name',)
     list_filter = ('category', 'year')
     empty_value_display = '-пусто-'
@@ -44,7 +47,8 @@ class CommentAdmin(admin.ModelAdmin):
 class ReviewAdmin(admin.ModelAdmin):
     """ Класс для управления отзывами в админке. """
 
-    list_display = ('pk', 'title', 'author', 'score')
+    list_display = ('pk', 'title', 'author', 'score', 'comments_count')
+    readonly_fields = ('comments_count',)
     list_filter = ('title', 'author', 'score')
     search_fields = ('title', 'author')
     empty_value_display = '-пусто-'
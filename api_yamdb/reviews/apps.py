@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
     verbose_name = "Произведения и отзывы"
+
+    def ready(self):
+        from . import signals
+        post_migrate.connect(signals.update_search_index, sender=self)
+        post_migrate.connect(signals.update_rating_indexes, sender=self)
@@ -0,0 +1,67 @@
+""" Удаление произведений и пользователей с большим числом отзывов.
+
+Удаление через сборщик каскада Django загружает в память все отзывы и
+комментарии объекта и удаляет их в одной транзакции. Поэтому API и
+админка только скрывают объект методом soft_delete, а команда
+purge_deleted удаляет зависимые строки пачками по batch_size, каждую в
+своей транзакции, и только потом сам объект. Память и время блокировок
+не зависят от числа отзывов и комментариев.
+
+Пачки удаляются без сборщика каскада и сигналов, поэтому каждая пачка
+стоит нескольких запросов. Агрегаты при этом не меняются: отзывы и
+комментарии скрытого пользователя вычтены из них одним запросом еще при
+скрытии (см. reviews.signals.hide_user_activity), а остальные удаляемые
+строки относятся к скрытому произведению или к удаляемым отзывам.
+"""
+from api.cache import bump_versions_on_commit
+from django.db import transaction
+
+from .models import Comment, Review
+
+
+def delete_in_batches(queryset, batch_size):
+    """ Удаляет строки queryset пачками и возвращает их количество. """
+
+    model = queryset.model
+    deleted = 0
+    while True:
+        with transaction.atomic(using=queryset.db):
+            pks = list(queryset.order_by().values_list(
+                'pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            # Зависимые строки к этому моменту уже удалены, а агрегаты
+            # видимых объектов от пачки не зависят, поэтому сборщик
+            # каскада и сигналы не нужны.
+            model._base_manager.using(queryset.db).filter(
+                pk__in=pks)._raw_delete(queryset.db)
+            bump_versions_on_commit('titles')
+        deleted += len(pks)
+
+
+def purge_title(title, batch_size):
+    """ Удаляет скрытое произведение вместе с отзывами и комментариями.
+    Возвращает количество удаленных отзывов и комментариев. """
+
+    comments = delete_in_batches(
+        Comment.objects.filter(review__title=title), batch_size)
+    reviews = delete_in_batches(
+        Review.objects.filter(title=title), batch_size)
+    # Осталось несколько связей с жанрами и строки популярности.
+    title.delete()
+    return reviews, comments
+
+
+def purge_user(user, batch_size):
+    """ Удаляет скрытого пользователя вместе с его отзывами и
+    комментариями. Возвращает количество удаленных отзывов и
+    комментариев. """
+
+    comments = delete_in_batches(
+        Comment.objects.filter(review__author=user), batch_size)
+    comments += delete_in_batches(
+        Comment.objects.filter(author=user), batch_size)
+    reviews = delete_in_batches(
+        Review.objects.filter(author=user), batch_size)
+    user.delete()
+    return reviews, comments
@@ -0,0 +1,188 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, GenreTitle, Review, Title
+
+FORMATS = ('ndjson', 'csv')
+
+TITLE_FIELDS = ('id', 'name', 'year', 'description', 'category', 'genre',
+                'rating', 'reviews_count')
+REVIEW_FIELDS = ('id', 'author', 'score', 'text', 'pub_date')
+COMMENT_FIELDS = ('id', 'author', 'text', 'pub_date')
+
+
+def group_rows(rows, key):
+    """ Группирует строки, упорядоченные по key, в пары (key, строки). """
+
+    for value, group in groupby(rows, itemgetter(key)):
+        group = list(group)
+        for row in group:
+            del row[key]
+        yield value, group
+
+
+def attach(parents, groups, name):
+    """ Добавляет к строкам parents, упорядоченным по id, дочерние строки
+    из groups, упорядоченных по тому же id, одним проходом по обоим
+    потокам. """
+
+    groups = iter(groups)
+    current = next(groups, None)
+    for parent in parents:
+        while current is not None and current[0] < parent['id']:
+            current = next(groups, None)
+        if current is not None and current[0] == parent['id']:
+            parent[name] = current[1]
+            current = next(groups, None)
+        else:
+            parent[name] = []
+        yield parent
+
+
+def with_comments(reviews, chunk_size):
+    """ Добавляет комментарии к отзывам: для каждой пачки из chunk_size
+    отзывов комментарии читаются одним запросом в порядке review_id. """
+
+    while True:
+        chunk = list(islice(reviews, chunk_size))
+        if not chunk:
+            return
+        comments = Comment.objects.filter(
+            review_id__in=[review['id'] for review in chunk],
+            author__deleted_at__isnull=True,
+        ).order_by('review_id', 'id').values(
+            'review_id', 'id', 'author__username', 'text', 'pub_date',
+        ).iterator(chunk_size=chunk_size)
+        # attach дополняет отзывы на месте, порядок пачки сохраняется.
+        for _ in attach(sorted(chunk, key=itemgetter('id')),
+                        group_rows(comments, 'review_id'), 'comments'):
+            pass
+        yield from chunk
+
+
+def load_reviews(after, comments, chunk_size):
+    """ Отзывы произведений с id больше after в порядке (title_id, id),
+    сгруппированные по произведениям. """
+
+    reviews = Review.objects.filter(
+        title_id__gt=after, title__deleted_at__isnull=True,
+        author__deleted_at__isnull=True,
+    ).order_by('title_id', 'id').values(
+        'title_id', 'id', 'author__username', 'score', 'text', 'pub_date',
+    ).iterator(chunk_size=chunk_size)
+    if comments:
+        reviews = with_comments(reviews, chunk_size)
+    return group_rows(reviews, 'title_id')
+
+
+def export_titles(after=0, reviews=False, comments=False, chunk_size=1000):
+    """ Возвращает произведения с id больше after в порядке id.
+
+    Произведения и отзывы читаются курсорами на стороне сервера в порядке
+    id произведения и объединяются одним проходом, жанры загружаются для
+    каждой пачки из chunk_size произведений, а комментарии — для каждой
+    пачки отзывов, поэтому память не зависит от размера каталога.
+    """
+
+    titles = Title.objects.filter(pk__gt=after).order_by('pk').values(
+        'id', 'name', 'year', 'description', 'category__slug', 'rating',
+        'reviews_count',
+    ).iterator(chunk_size=chunk_size)
+    if reviews or comments:
+        titles = attach(titles, load_reviews(after, comments, chunk_size),
+                        'reviews')
+    while True:
+        chunk = list(islice(titles, chunk_size))
+        if not chunk:
+            return
+        ids = [title['id'] for title in chunk]
+        genres = defaultdict(list)
+        for title_id, slug in GenreTitle.objects.filter(
+                title_id__in=ids).order_by('genre__slug').values_list(
+                    'title_id', 'genre__slug'):
+            genres[title_id].append(slug)
+        for title in chunk:
+            title['category'] = title.pop('category__slug')
+            title['genre'] = genres.get(title['id'], [])
+            yield title
+
+
+def rename_authors(rows):
+    for row in rows:
+        row['author'] = row.pop('author__username')
+        rename_authors(row.get('comments', ()))
+    return rows
+
+
+def ndjson_lines(titles):
+    """ Одно произведение в строке JSON. """
+
+    for title in titles:
+        rename_authors(title.get('reviews', ()))
+        yield json.dumps(title, cls=DjangoJSONEncoder,
+                         ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """ Буфер для csv.writer, который возвращает записанную строку. """
+
+    def write(self, value):
+        return value
+
+
+def csv_header(reviews, comments):
+    header = list(TITLE_FIELDS)
+    if reviews or comments:
+        header += [f'review_{field}' for field in REVIEW_FIELDS]
+    if comments:
+        header += [f'comment_{field}' for field in COMMENT_FIELDS]
+    return header
+
+
+def csv_rows(title, reviews, comments):
+    """ Разворачивает произведение в строки: по одной на каждый
+    комментарий или отзыв без комментариев. """
+
+    row = [title[field] for field in TITLE_FIELDS[:-3]]
+    row += [','.join(title['genre']), title['rating'],
+            title['reviews_count']]
+    if not (reviews or comments):
+        yield row
+        return
+    empty_review = [''] * len(REVIEW_FIELDS)
+    empty_comment = [''] * len(COMMENT_FIELDS) if comments else []
+    if not title['reviews']:
+        yield row + empty_review + empty_comment
+    for review in rename_authors(title['reviews']):
+        review_row = row + [review[field] for field in REVIEW_FIELDS]
+        if not review.get('comments'):
+            yield review_row + empty_comment
+        for comment in review.get('comments', ()):
+            yield review_row + [comment[field] for field in COMMENT_FIELDS]
+
+
+def csv_lines(titles, reviews=False, comments=False, header=True):
+    """ Строки CSV. Жанры перечисляются через запятую. """
+
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(csv_header(reviews, comments))
+    for title in titles:
+        for row in csv_rows(title, reviews, comments):
+            yield writer.writerow(row)
+
+
+def export_lines(output, after=0, reviews=False, comments=False,
+                 chunk_size=1000):
+    """ Возвращает строки выгрузки каталога в формате output. При
+    продолжении выгрузки заголовок CSV не повторяется. """
+
+    titles = export_titles(after, reviews, comments, chunk_size)
+    if output == 'csv':
+        return csv_lines(titles, reviews, comments, header=not after)
+    return ndjson_lines(titles)
@@ -0,0 +1,35 @@
+# Индексы для сортировки произведений по рейтингу. Произведения без
+# рейтинга должны оказываться в конце списка по убыванию рейтинга, а
+# Django 2.2 не умеет задавать NULLS LAST в Meta.indexes, поэтому индексы
+# создаются SQL запросами. В SQLite NULL и так меньше любого числа.
+RATING_INDEXES = {
+    'title_rating_idx': ('rating', 'id'),
+    'title_category_rating_idx': ('category_id', 'rating', 'id'),
+}
+PG_COLUMNS = {
+    'rating': 'rating DESC NULLS LAST',
+    'id': 'id DESC',
+}
+
+
+def create_rating_indexes(connection):
+    """ Создает индексы по рейтингу, если их еще нет.
+
+    Как и поисковый индекс, вызывается и после каждой миграции: SQLite
+    при пересоздании таблицы сохраняет только индексы из Meta.
+    """
+
+    with connection.cursor() as cursor:
+        for name, columns in RATING_INDEXES.items():
+            if connection.vendor == 'postgresql':
+                columns = [PG_COLUMNS.get(column, column)
+                           for column in columns]
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON reviews_title '
+                f'({", ".join(columns)})')
+
+
+def drop_rating_indexes(connection):
+    with connection.cursor() as cursor:
+        for name in RATING_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
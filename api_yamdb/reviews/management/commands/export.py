@@ -0,0 +1,40 @@
+from django.core.management import BaseCommand
+from reviews.export import FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Команда для выгрузки каталога произведений в NDJSON или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=FORMATS, default='ndjson',
+            help='Формат выгрузки.')
+        parser.add_argument(
+            '--output', help='Файл выгрузки, по умолчанию stdout.')
+        parser.add_argument(
+            '--after', type=int, default=0,
+            help='Продолжить выгрузку после произведения с этим id.')
+        parser.add_argument(
+            '--reviews', action='store_true',
+            help='Добавить отзывы к произведениям.')
+        parser.add_argument(
+            '--comments', action='store_true',
+            help='Добавить отзывы и комментарии к ним.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество произведений, читаемых из БД за раз.')
+
+    def handle(self, *args, **options):
+        """ Агрегирующий метод, который вызывается с помощью команды export
+        и построчно записывает каталог в файл или stdout. """
+
+        lines = export_lines(
+            options['format'], options['after'], options['reviews'],
+            options['comments'], options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'a' if options['after'] else 'w',
+                  encoding='utf-8', newline='') as f:
+            f.writelines(lines)
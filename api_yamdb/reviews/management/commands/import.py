@@ -1,6 +1,14 @@
+import csv
+import io
+import os
+import time
 from csv import DictReader
+from itertools import islice
 
-from django.core.management import BaseCommand
+from api.cache import bump_versions
+from django.core.management import BaseCommand, CommandError, call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
 # Импорт моделей
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
@@ -22,20 +30,166 @@ class Command(BaseCommand):
         ),
     )
 
-    def import_data(self):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default=os.path.join('static', 'data'),
+            help='Папка с csv файлами.')
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='Загружать данные пачками, без проверки каждой строки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной пачке при загрузке с --bulk.')
+
+    def import_data(self, data_dir):
         """ Метод импортирует пользователей, категории и жанры в БД. """
 
         for data in self.models:
             for model, file in data:
-                with open(f'static/data/{file}.csv', encoding='utf-8') as f:
-                    print(f'Начался импорт данных {file}')
+                path = os.path.join(data_dir, f'{file}.csv')
+                with open(path, encoding='utf-8') as f:
+                    self.stdout.write(f'Начался импорт данных {file}')
                     for row in DictReader(f):
                         if not model.objects.filter(**row).exists():
                             model.objects.create(**row)
-                print(f'Импорт данных {file} завершен.')
+                self.stdout.write(f'Импорт данных {file} завершен.')
+
+    def bulk_import_data(self, data_dir, batch_size):
+        """ Метод загружает csv файлы пачками через bulk_create, а для
+        PostgreSQL через COPY. """
+
+        # Первичные ключи загруженных объектов, по которым проверяются
+        # внешние ключи следующих файлов без запросов к БД.
+        self.known_ids = {}
+        for data in self.models:
+            for model, file in data:
+                path = os.path.join(data_dir, f'{file}.csv')
+                with open(path, encoding='utf-8') as f:
+                    self.stdout.write(f'Начался импорт данных {file}')
+                    self.bulk_import_file(model, DictReader(f), batch_size)
+                self.known_ids[model] = set(
+                    model.objects.values_list('pk', flat=True))
+                self.stdout.write(f'Импорт данных {file} завершен.')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model for data in self.models
+                                 for model, _ in data]):
+                cursor.execute(sql)
+        # bulk_create не вызывает сигналы, поэтому агрегаты рейтинга и
+        # количество комментариев пересчитываются после загрузки.
+        call_command('rebuild_aggregates', stdout=self.stdout)
+        bump_versions('titles', 'categories', 'genres')
+
+    def bulk_import_file(self, model, reader, batch_size):
+        fields = self.get_fields(model, reader.fieldnames)
+        started = time.monotonic()
+        imported = skipped = 0
+        # Номер строки файла для сообщений о пропущенных строках.
+        rows = ((reader.line_num, row) for row in reader)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            objs = [
+                obj for obj in (self.build_object(model, fields, row, line)
+                                for line, row in chunk)
+                if obj is not None
+            ]
+            skipped += len(chunk) - len(objs)
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    self.copy_objects(model, objs)
+                else:
+                    model.objects.bulk_create(objs, ignore_conflicts=True)
+            imported += len(objs)
+            rate = imported / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'  {imported} строк ({rate:.0f} строк/с), '
+                f'пропущено {skipped}')
+
+    @staticmethod
+    def get_fields(model, columns):
+        """ Сопоставляет колонкам csv файла поля модели. Внешние ключи
+        можно указывать как по имени поля, так и по имени колонки. """
+
+        fields = {}
+        for field in model._meta.concrete_fields:
+            fields[field.name] = fields[field.attname] = field
+        unknown = set(columns) - set(fields)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные колонки для {model.__name__}: '
+                f'{", ".join(sorted(unknown))}')
+        return {column: fields[column] for column in columns}
+
+    def build_object(self, model, fields, row, line):
+        """ Создает объект модели из строки csv файла. Возвращает None и
+        сообщает строку и колонку, если внешний ключ не является числом
+        или ссылается на несуществующий объект. """
+
+        values = {}
+        for column, value in row.items():
+            field = fields[column]
+            if field.is_relation:
+                if value == '' and field.null:
+                    value = None
+                else:
+                    try:
+                        known = int(value) in self.known_ids.get(
+                            field.related_model, ())
+                    except ValueError:
+                        self.stderr.write(
+                            f'  строка {line}, колонка {column}: '
+                            f'{value!r} не является id')
+                        return None
+                    if not known:
+                        self.stderr.write(
+                            f'  строка {line}, колонка {column}: '
+                            f'{field.related_model.__name__} с id '
+                            f'{value} не найден')
+                        return None
+            values[field.attname] = value
+        return model(**values)
+
+    @staticmethod
+    def copy_objects(model, objs):
+        """ Загружает объекты через COPY во временную таблицу, откуда они
+        переносятся в основную с пропуском уже существующих строк. """
+
+        fields = [field for field in model._meta.concrete_fields
+                  if not (field.primary_key and all(
+                      obj.pk is None for obj in objs))]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            row = []
+            for field in fields:
+                value = field.get_db_prep_save(
+                    field.pre_save(obj, add=True), connection)
+                row.append(r'\N' if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(model._meta.db_table)
+        temp = connection.ops.quote_name(f'import_{model._meta.db_table}')
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {temp} '
+                f'(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP')
+            cursor.copy_expert(
+                f"COPY {temp} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '\\N')", buffer)
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM {temp} ON CONFLICT DO NOTHING')
 
     def handle(self, *args, **options):
         """ Агрегирующий метод, который вызывается с помощью команды import
         и добавляет тестовые данные в БД. """
 
-        self.import_data()
+        if options['bulk']:
+            self.bulk_import_data(options['data_dir'], options['batch_size'])
+        else:
+            self.import_data(options['data_dir'])
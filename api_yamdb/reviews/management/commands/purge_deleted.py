@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+from reviews.deletion import purge_title, purge_user
+from reviews.models import Title, User
+
+
+class Command(BaseCommand):
+    help = "Команда для удаления скрытых произведений и пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк, удаляемых в одной транзакции.')
+
+    def purge(self, queryset, purge_object, batch_size):
+        for obj in queryset.order_by('pk'):
+            reviews, comments = purge_object(obj, batch_size)
+            self.stdout.write(f'Удален {obj._meta.verbose_name} {obj}: '
+                              f'отзывов {reviews}, комментариев {comments}.')
+
+    def handle(self, *args, **options):
+        """ Агрегирующий метод, который вызывается с помощью команды
+        purge_deleted и удаляет скрытые объекты вместе с зависимыми. """
+
+        batch_size = options['batch_size']
+        self.purge(Title.all_objects.filter(deleted_at__isnull=False),
+                   purge_title, batch_size)
+        self.purge(User.all_objects.filter(deleted_at__isnull=False),
+                   purge_user, batch_size)
@@ -0,0 +1,73 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ("Команда для проверки и пересчета агрегатов рейтинга "
+            "произведений и количества комментариев к отзывам")
+
+    rating_fields = ('reviews_count', 'score_sum', 'rating')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить агрегаты, не исправляя их.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк, обновляемых за один запрос.')
+
+    def rebuild_ratings(self, titles, batch_size):
+        """ Метод записывает в произведения агрегаты, посчитанные по
+        отзывам. """
+
+        batch = []
+        for title in titles.iterator(chunk_size=batch_size):
+            title.reviews_count = title.actual_reviews_count
+            title.score_sum = title.actual_score_sum
+            title.rating = (title.score_sum / title.reviews_count
+                            if title.reviews_count else None)
+            batch.append(title)
+            if len(batch) >= batch_size:
+                self.save_batch(Title, batch, self.rating_fields)
+                batch = []
+        self.save_batch(Title, batch, self.rating_fields)
+
+    def rebuild_comments_counts(self, reviews, batch_size):
+        """ Метод записывает в отзывы количество их комментариев. """
+
+        batch = []
+        for review in reviews.iterator(chunk_size=batch_size):
+            review.comments_count = review.actual_comments_count
+            batch.append(review)
+            if len(batch) >= batch_size:
+                self.save_batch(Review, batch, ('comments_count',))
+                batch = []
+        self.save_batch(Review, batch, ('comments_count',))
+
+    @staticmethod
+    def save_batch(model, batch, fields):
+        with transaction.atomic():
+            model.objects.bulk_update(batch, fields)
+
+    def handle(self, *args, **options):
+        """ Агрегирующий метод, который вызывается с помощью команды
+        rebuild_aggregates и проверяет или пересчитывает рейтинги
+        произведений и количество комментариев к отзывам. """
+
+        titles = Title.objects.with_stale_rating().order_by('pk')
+        reviews = Review.objects.with_stale_comments_count().order_by('pk')
+        titles_count, reviews_count = titles.count(), reviews.count()
+        if options['check']:
+            if titles_count or reviews_count:
+                raise CommandError(
+                    f'Агрегаты не совпадают с отзывами у {titles_count} '
+                    f'произведений и с комментариями у {reviews_count} '
+                    f'отзывов.')
+            self.stdout.write('Агрегаты совпадают с отзывами и '
+                              'комментариями.')
+            return
+        self.rebuild_ratings(titles, options['batch_size'])
+        self.rebuild_comments_counts(reviews, options['batch_size'])
+        self.stdout.write(f'Пересчитаны агрегаты {titles_count} '
+                          f'произведений и {reviews_count} отзывов.')
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+from reviews.trending import fold_reviews, rebuild_trending
+
+
+class Command(BaseCommand):
+    help = "Команда для пересчета популярности произведений по новым отзывам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать популярность по всем отзывам заново.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество отзывов, учитываемых в одной транзакции.')
+        parser.add_argument(
+            '--lag', type=float, default=60,
+            help='Не учитывать отзывы моложе стольких секунд: их '
+                 'транзакции могут быть еще не зафиксированы.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершать работу, а учитывать новые отзывы каждые '
+                 '--interval секунд.')
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help='Пауза между пересчетами в секундах.')
+
+    def handle(self, *args, **options):
+        """ Агрегирующий метод, который вызывается с помощью команды
+        update_trending и учитывает новые отзывы в популярности. """
+
+        update = rebuild_trending if options['rebuild'] else fold_reviews
+        while True:
+            until = timezone.now() - timedelta(seconds=options['lag'])
+            folded = update(options['batch_size'], until)
+            self.stdout.write(f'Учтено отзывов: {folded}')
+            if not options['loop']:
+                return
+            update = fold_reviews
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:32
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def delete_duplicate_genres(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    duplicates = GenreTitle.objects.values('title', 'genre').annotate(
+        first_id=Min('id'), links=Count('id')).filter(links__gt=1)
+    for duplicate in duplicates.iterator():
+        GenreTitle.objects.filter(
+            title=duplicate['title'], genre=duplicate['genre'],
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_genres, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['genre', 'title'], name='genre_title_genre_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='genre_title_unique'),
+        ),
+        migrations.AlterField(
+            model_name='genretitle',
+            name='genre',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.Genre'),
+        ),
+        migrations.AlterField(
+            model_name='genretitle',
+            name='title',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.Title'),
+        ),
+    ]
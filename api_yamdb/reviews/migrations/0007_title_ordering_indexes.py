@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:36
+
+from django.db import migrations, models
+from reviews.indexes import create_rating_indexes, drop_rating_indexes
+
+
+def create_indexes(apps, schema_editor):
+    create_rating_indexes(schema_editor.connection)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_rating_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_genre_title_unique'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='title',
+            options={'ordering': ('year', 'id'), 'verbose_name': 'Произведение', 'verbose_name_plural': 'Произведения'},
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['reviews_count', 'id'], name='title_reviews_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'reviews_count', 'id'], name='title_category_reviews_idx'),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGenreTitle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_score', models.FloatField(verbose_name='Логарифм популярности')),
+            ],
+            options={
+                'verbose_name': 'Популярность произведения в жанре',
+                'verbose_name_plural': 'Популярность произведений в жанрах',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_pub_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего отзыва')),
+                ('review_id', models.PositiveIntegerField(default=0, verbose_name='id последнего отзыва')),
+            ],
+            options={
+                'verbose_name': 'Состояние популярности',
+                'verbose_name_plural': 'Состояние популярности',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingTitle',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('log_score', models.FloatField(verbose_name='Логарифм популярности')),
+            ],
+            options={
+                'verbose_name': 'Популярность произведения',
+                'verbose_name_plural': 'Популярность произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['pub_date', 'id'], name='review_pub_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='trendingtitle',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.Category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='trendinggenretitle',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AddField(
+            model_name='trendinggenretitle',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingtitle',
+            index=models.Index(fields=['-log_score'], name='trending_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingtitle',
+            index=models.Index(fields=['category', '-log_score'], name='trending_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendinggenretitle',
+            index=models.Index(fields=['genre', '-log_score'], name='trending_genre_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendinggenretitle',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='trending_genre_title_unique'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def fill_comments_count(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    counts = Comment.objects.filter(
+        review=OuterRef('pk'),
+    ).order_by().values('review').annotate(count=Count('pk')).values('count')
+    Review.objects.filter(pk__in=Comment.objects.values('review')).update(
+        comments_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comments_count,
+                             migrations.RunPython.noop),
+    ]
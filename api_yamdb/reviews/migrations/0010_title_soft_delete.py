@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_review_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='title_deleted_idx'),
+        ),
+    ]
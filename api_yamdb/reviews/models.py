@@ -2,7 +2,11 @@ import datetime
 
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, F, FloatField, OuterRef, Q,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 from users.models import User
 
 # Константа для проверки года
@@ -40,6 +44,73 @@ class Genre(BaseModel):
         verbose_name_plural = "Жанры"
 
 
+class TitleQuerySet(models.QuerySet):
+    """ Запросы для работы с агрегатами рейтинга произведений. """
+
+    # Рейтинг считается из уже сохраненных в строке агрегатов,
+    # поэтому его обновление не требует чтения отзывов.
+    rating_expression = Case(
+        When(reviews_count=0, then=Value(None)),
+        default=Cast('score_sum', FloatField()) / F('reviews_count'),
+        output_field=FloatField(),
+    )
+
+    def add_review_score(self, title_id, score, count):
+        """ Атомарно изменяет сумму оценок и количество отзывов
+        произведения и пересчитывает его рейтинг. """
+
+        titles = self.filter(pk=title_id)
+        now = timezone.now()
+        with transaction.atomic():
+            titles.update(score_sum=F('score_sum') + score,
+                          reviews_count=F('reviews_count') + count,
+                          updated_at=now, reviews_updated_at=now)
+            titles.update(rating=self.rating_expression)
+
+    def subtract_author_reviews(self, author):
+        """ Атомарно вычитает отзывы скрытого автора из агрегатов
+        произведений. У автора не больше одного отзыва на произведение,
+        поэтому все произведения обновляются двумя запросами. """
+
+        titles = self.filter(pk__in=Review.objects.filter(
+            author=author).values('title_id'))
+        scores = Review.objects.filter(
+            title=OuterRef('pk'), author=author).values('score')[:1]
+        now = timezone.now()
+        with transaction.atomic():
+            titles.update(score_sum=F('score_sum') - Subquery(scores),
+                          reviews_count=F('reviews_count') - 1,
+                          updated_at=now, reviews_updated_at=now)
+            titles.update(rating=self.rating_expression)
+
+    def with_review_stats(self):
+        """ Добавляет к произведениям агрегаты, посчитанные по отзывам
+        видимых авторов. """
+
+        visible = Q(reviews__author__deleted_at__isnull=True)
+        return self.annotate(
+            actual_reviews_count=Count('reviews', filter=visible),
+            actual_score_sum=Coalesce(
+                Sum('reviews__score', filter=visible), 0),
+        )
+
+    def with_stale_rating(self):
+        """ Возвращает произведения, агрегаты которых не совпадают с
+        отзывами. """
+
+        return self.with_review_stats().exclude(
+            reviews_count=F('actual_reviews_count'),
+            score_sum=F('actual_score_sum'),
+        )
+
+
+class TitleManager(models.Manager.from_queryset(TitleQuerySet)):
+    """ Менеджер произведений без удаленных. """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Title(models.Model):
     """ Модель произведений. """
 
@@ -59,12 +130,51 @@ class Title(models.Model):
         through='GenreTitle',
         verbose_name='Жанры'
     )
+    # Агрегаты отзывов хранятся в строке произведения и обновляются
+    # при каждом изменении отзыва (см. reviews.signals).
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False)
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False)
+    rating = models.FloatField(
+        'Рейтинг', blank=True, null=True, editable=False)
+    # Отметки времени для условных GET-запросов: изменение самого
+    # произведения (включая рейтинг, категорию и жанры) и его отзывов.
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    reviews_updated_at = models.DateTimeField(
+        'Дата изменения отзывов', blank=True, null=True, editable=False)
+    # Удаленное произведение скрыто, а его отзывы удаляет пачками
+    # команда purge_deleted (см. reviews.deletion).
+    deleted_at = models.DateTimeField(
+        'Дата удаления', blank=True, null=True, editable=False)
+
+    objects = TitleManager()
+    all_objects = TitleQuerySet.as_manager()
 
     class Meta:
-        ordering = ('year',)
+        ordering = ('year', 'id')
+        # Индексы для сортировки списка произведений. Индексы по
+        # рейтингу зависят от СУБД и создаются в миграции
+        # 0007_title_ordering_indexes.
+        indexes = (
+            models.Index(fields=('year', 'id'), name='title_year_idx'),
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+            models.Index(fields=('reviews_count', 'id'),
+                         name='title_reviews_count_idx'),
+            models.Index(fields=('category', 'reviews_count', 'id'),
+                         name='title_category_reviews_idx'),
+            models.Index(fields=('deleted_at',), name='title_deleted_idx',
+                         condition=Q(deleted_at__isnull=False)),
+        )
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
 
+    def soft_delete(self):
+        """ Скрывает произведение до удаления командой purge_deleted. """
+
+        self.deleted_at = timezone.now()
+        self.save(update_fields=('deleted_at', 'updated_at'))
+
     def get_genres(self):
         """ Метод возвращает жанры произведения. """
 
@@ -77,13 +187,94 @@ class Title(models.Model):
 class GenreTitle(models.Model):
     """ Связующая модель для жанров и произведений. """
 
-    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
-    title = models.ForeignKey(Title, on_delete=models.CASCADE)
+    # Отдельные индексы внешних ключей не нужны: их покрывают составные
+    # индексы из Meta.
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              db_index=False)
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              db_index=False)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=('title', 'genre'),
+                                    name='genre_title_unique'),
+        )
+        indexes = (
+            models.Index(fields=('genre', 'title'),
+                         name='genre_title_genre_idx'),
+        )
 
     def __str__(self):
         return f'{self.genre} {self.title}'
 
 
+class ReviewQuerySet(models.QuerySet):
+    """ Запросы для работы с количеством комментариев к отзывам. """
+
+    def add_comments(self, review_id, count):
+        """ Атомарно изменяет количество комментариев отзыва и отмечает
+        изменение отзывов его произведения. """
+
+        now = timezone.now()
+        with transaction.atomic():
+            self.filter(pk=review_id).update(
+                comments_count=F('comments_count') + count,
+                comments_updated_at=now)
+            # Количество комментариев выводится в списке отзывов.
+            Title.objects.filter(reviews=review_id).update(
+                reviews_updated_at=now)
+
+    def subtract_author_comments(self, author):
+        """ Атомарно вычитает комментарии скрытого автора из количества
+        комментариев отзывов и отмечает изменение отзывов их
+        произведений. """
+
+        reviews = self.filter(pk__in=Comment.objects.filter(
+            author=author).values('review_id'))
+        counts = Comment.objects.filter(
+            review=OuterRef('pk'), author=author,
+        ).order_by().values('review').annotate(
+            count=Count('pk')).values('count')
+        now = timezone.now()
+        with transaction.atomic():
+            Title.objects.filter(
+                pk__in=reviews.values('title_id'),
+            ).update(reviews_updated_at=now)
+            reviews.update(
+                comments_count=F('comments_count') - Subquery(counts),
+                comments_updated_at=now)
+
+    def touch_author(self, author):
+        """ Отмечает изменение отзывов и комментариев автора и списков, в
+        которых они выводятся, например после смены имени автора. """
+
+        reviews = self.filter(author=author)
+        comments = Comment.objects.filter(author=author)
+        now = timezone.now()
+        with transaction.atomic():
+            Title.objects.filter(
+                pk__in=reviews.values('title_id'),
+            ).update(reviews_updated_at=now)
+            reviews.update(updated_at=now)
+            self.filter(pk__in=comments.values('review_id')).update(
+                comments_updated_at=now)
+            comments.update(updated_at=now)
+
+    def with_stale_comments_count(self):
+        """ Возвращает отзывы, количество комментариев которых не совпадает
+        с комментариями видимых авторов. """
+
+        return self.annotate(actual_comments_count=Count(
+            'comments', filter=Q(comments__author__deleted_at__isnull=True),
+        )).exclude(comments_count=F('actual_comments_count'))
+
+    def visible(self):
+        """ Отзывы без удаленных произведений и авторов. """
+
+        return self.filter(title__deleted_at__isnull=True,
+                           author__deleted_at__isnull=True)
+
+
 class Review(models.Model):
     """ Модель отзывов пользователей к произведениям. """
 
@@ -114,9 +305,28 @@ class Review(models.Model):
         auto_now_add=True,
         verbose_name='Дата отзыва'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    comments_updated_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Дата изменения комментариев'
+    )
+    # Количество комментариев обновляется при каждом создании и удалении
+    # комментария (см. reviews.signals).
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         constraints = [
@@ -125,10 +335,31 @@ class Review(models.Model):
                 name='unique_author_title'
             )
         ]
+        indexes = [
+            # Индекс для постраничного вывода отзывов произведения.
+            models.Index(fields=('title', '-pub_date', '-id'),
+                         name='review_title_pub_date_idx'),
+            # Индекс для чтения новых отзывов при подсчете популярности.
+            models.Index(fields=('pub_date', 'id'),
+                         name='review_pub_date_idx'),
+            # Индекс для ленты активности автора (см. reviews.activity).
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='review_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженные значения, чтобы при сохранении
+        # пересчитать рейтинг только на величину изменения.
+        loaded = dict(zip(field_names, values))
+        if 'title_id' in loaded and 'score' in loaded:
+            instance._loaded_score = (loaded['title_id'], loaded['score'])
+        return instance
+
 
 class Comment(models.Model):
     """ Модель комментариев пользователей к отзывам. """
@@ -147,17 +378,128 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='comments',
+        db_index=False,
         verbose_name='Автор',
     )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            # Индекс для постраничного вывода комментариев к отзыву.
+            models.Index(fields=('review', '-pub_date', '-id'),
+                         name='comment_review_pub_date_idx'),
+            # Индекс для ленты активности автора, он же заменяет индекс
+            # внешнего ключа author.
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='comment_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем отзыв, чтобы при переносе комментария обновить
+        # количество комментариев обоих отзывов.
+        if 'review_id' in field_names:
+            instance._loaded_review_id = values[
+                field_names.index('review_id')]
+        return instance
+
+
+class TrendingTitle(models.Model):
+    """ Популярность произведения по недавним отзывам.
+
+    log_score — натуральный логарифм суммы оценок отзывов, каждая из
+    которых умножена на exp((pub_date - TRENDING_EPOCH) / tau). Такой
+    счет не нужно пересчитывать со временем: затухание одинаково для
+    всех произведений, поэтому порядок по log_score совпадает с порядком
+    по затухшей популярности (см. reviews.trending).
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Произведение',
+    )
+    # Копия категории произведения для индекса (category, -log_score).
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Категория',
+    )
+    log_score = models.FloatField('Логарифм популярности')
+
+    class Meta:
+        verbose_name = 'Популярность произведения'
+        verbose_name_plural = 'Популярность произведений'
+        indexes = [
+            models.Index(fields=('-log_score',),
+                         name='trending_score_idx'),
+            models.Index(fields=('category', '-log_score'),
+                         name='trending_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} {self.log_score}'
+
+
+class TrendingGenreTitle(models.Model):
+    """ Популярность произведения в каждом из его жанров. """
+
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Жанр',
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение',
+    )
+    log_score = models.FloatField('Логарифм популярности')
+
+    class Meta:
+        verbose_name = 'Популярность произведения в жанре'
+        verbose_name_plural = 'Популярность произведений в жанрах'
+        constraints = [
+            models.UniqueConstraint(fields=('title', 'genre'),
+                                    name='trending_genre_title_unique'),
+        ]
+        indexes = [
+            models.Index(fields=('genre', '-log_score'),
+                         name='trending_genre_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.genre_id} {self.title_id} {self.log_score}'
+
+
+class TrendingState(models.Model):
+    """ Позиция последнего учтенного в популярности отзыва. """
+
+    review_pub_date = models.DateTimeField(
+        'Дата последнего отзыва', blank=True, null=True)
+    review_id = models.PositiveIntegerField('id последнего отзыва', default=0)
+
+    class Meta:
+        verbose_name = 'Состояние популярности'
+        verbose_name_plural = 'Состояние популярности'
@@ -0,0 +1,112 @@
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый индекс названий произведений. В PostgreSQL это
+# GIN индекс по tsvector, в SQLite таблица FTS5, которую синхронизируют
+# с reviews_title триггеры.
+PG_INDEX = 'title_name_search_idx'
+PG_VECTOR = "to_tsvector('simple', {column})"
+FTS_TABLE = 'reviews_title_fts'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f'''
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON reviews_title BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+        END''',
+    f'{FTS_TABLE}_ad': f'''
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON reviews_title BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name)
+            VALUES ('delete', old.id, old.name);
+        END''',
+    f'{FTS_TABLE}_au': f'''
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name ON reviews_title
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name)
+            VALUES ('delete', old.id, old.name);
+            INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+        END''',
+}
+
+
+class RawSubquery(RawSQL):
+    """ Подзапрос для lookup __in, который сам оборачивает его в скобки.
+    Двойные скобки превратили бы подзапрос в одно скалярное значение. """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def create_search_index(connection):
+    """ Создает поисковый индекс произведений, если его еще нет.
+
+    В SQLite пересоздание таблицы при миграциях удаляет триггеры,
+    поэтому функция вызывается и после каждой миграции: недостающие
+    триггеры создаются заново, а индекс перестраивается.
+    """
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON reviews_title '
+                f'USING GIN ({PG_VECTOR.format(column="name")})')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"name, content='reviews_title', content_rowid='id')")
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'reviews_title'")
+            existing = {name for name, in cursor.fetchall()}
+            if existing.issuperset(FTS_TRIGGERS):
+                return
+            for name, sql in FTS_TRIGGERS.items():
+                if name not in existing:
+                    cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+        elif connection.vendor == 'sqlite':
+            for name in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def search_titles(queryset, query):
+    """ Оставляет произведения, в названии которых есть слова,
+    начинающиеся с каждого слова запроса, и сортирует их по
+    релевантности. """
+
+    words = re.findall(r'\w+', query.lower())
+    if not words:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        return queryset.filter(pk__in=RawSubquery(
+            f"SELECT id FROM reviews_title "
+            f"WHERE {PG_VECTOR.format(column='name')} "
+            f"@@ to_tsquery('simple', %s)", (tsquery,),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({PG_VECTOR.format(column='reviews_title.name')}, "
+            f"to_tsquery('simple', %s))", (tsquery,),
+        )).order_by('-search_rank', 'pk')
+    if vendor == 'sqlite':
+        # Соединение с таблицей FTS5 выполняет MATCH один раз и дает
+        # ранг bm25 для каждой найденной строки.
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.extra(
+            tables=(FTS_TABLE,),
+            where=(f'{FTS_TABLE}.rowid = reviews_title.id',
+                   f'{FTS_TABLE} MATCH %s'),
+            params=(match,),
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+        ).order_by('search_rank', 'pk')
+    for word in words:
+        queryset = queryset.filter(name__icontains=word)
+    return queryset
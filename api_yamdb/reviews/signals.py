@@ -0,0 +1,196 @@
+from django.db import connections
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .indexes import create_rating_indexes
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .search import create_search_index
+
+
+def is_hidden_author(instance):
+    """ Проверяет, скрыт ли автор отзыва или комментария. Записи скрытых
+    авторов уже вычтены из агрегатов (см. hide_user_activity). """
+
+    return User.all_objects.filter(
+        pk=instance.author_id, deleted_at__isnull=False).exists()
+
+
+@receiver(post_save, sender=User)
+def hide_user_activity(sender, instance, raw, update_fields, **kwargs):
+    """ Вычитает отзывы и комментарии скрытого пользователя из агрегатов
+    произведений и отзывов. """
+
+    if (raw or instance.deleted_at is None
+            or 'deleted_at' not in (update_fields or ())):
+        return
+    Title.objects.subtract_author_reviews(instance)
+    Review.objects.subtract_author_comments(instance)
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_author(sender, instance, raw, **kwargs):
+    """ Имя автора выводится в отзывах и комментариях, поэтому после его
+    смены условные запросы к ним не должны получать 304. """
+
+    loaded = getattr(instance, '_loaded_username', None)
+    if raw or loaded is None or loaded == instance.username:
+        return
+    Review.objects.touch_author(instance)
+    instance._loaded_username = instance.username
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw, **kwargs):
+    """ Запоминает оценку отзыва, если он был загружен без нее. """
+
+    if raw or instance._state.adding or hasattr(instance, '_loaded_score'):
+        return
+    instance._loaded_score = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('title_id', 'score')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """ Обновляет агрегаты произведения после создания или изменения
+    отзыва. """
+
+    if raw:
+        return
+    loaded = None if created else getattr(instance, '_loaded_score', None)
+    current = (instance.title_id, instance.score)
+    if loaded == current:
+        Title.objects.filter(pk=instance.title_id).update(
+            reviews_updated_at=timezone.now())
+        return
+    instance._loaded_score = current
+    if loaded is not None and is_hidden_author(instance):
+        return
+    if loaded is not None:
+        title_id, score = loaded
+        Title.objects.add_review_score(title_id, -score, -1)
+    Title.objects.add_review_score(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """ Обновляет агрегаты произведения после удаления отзыва. """
+
+    if is_hidden_author(instance):
+        return
+    title_id, score = getattr(
+        instance, '_loaded_score', (instance.title_id, instance.score))
+    Title.objects.add_review_score(title_id, -score, -1)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_review(sender, instance, raw, **kwargs):
+    """ Запоминает отзыв комментария, если он был загружен без него. """
+
+    if (raw or instance._state.adding
+            or hasattr(instance, '_loaded_review_id')):
+        return
+    instance._loaded_review_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('review_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, raw,
+                                  **kwargs):
+    """ Обновляет количество комментариев отзыва после создания или
+    переноса комментария. """
+
+    if raw:
+        return
+    loaded = None if created else getattr(
+        instance, '_loaded_review_id', None)
+    if loaded == instance.review_id:
+        Review.objects.add_comments(instance.review_id, 0)
+        return
+    instance._loaded_review_id = instance.review_id
+    if loaded is not None and is_hidden_author(instance):
+        return
+    if loaded is not None:
+        Review.objects.add_comments(loaded, -1)
+    Review.objects.add_comments(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    """ Обновляет количество комментариев отзыва после удаления
+    комментария. """
+
+    if is_hidden_author(instance):
+        return
+    Review.objects.add_comments(
+        getattr(instance, '_loaded_review_id', instance.review_id), -1)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    """ Отмечает изменение произведений после изменения их категории. """
+
+    if not kwargs.get('created') and not kwargs.get('raw'):
+        Title.objects.filter(category=instance).update(
+            updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    """ Отмечает изменение произведений после изменения их жанра. """
+
+    if not kwargs.get('created') and not kwargs.get('raw'):
+        Title.objects.filter(genre=instance).update(
+            updated_at=timezone.now())
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_genre_title(sender, instance, **kwargs):
+    """ Отмечает изменение произведения после изменения его жанров. """
+
+    if not kwargs.get('raw'):
+        Title.objects.filter(pk=instance.title_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_genres(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """ Отмечает изменение произведений после изменения их жанров через
+    менеджер связи. """
+
+    if reverse and action == 'pre_clear':
+        titles = Title.objects.filter(genre=instance)
+    elif reverse and action in ('post_add', 'post_remove'):
+        titles = Title.objects.filter(pk__in=pk_set)
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        titles = Title.objects.filter(pk=instance.pk)
+    else:
+        return
+    titles.update(updated_at=timezone.now())
+
+
+def update_search_index(sender, using, **kwargs):
+    """ Восстанавливает поисковый индекс произведений после миграций. """
+
+    connection = connections[using]
+    if Title._meta.db_table in connection.introspection.table_names():
+        create_search_index(connection)
+
+
+def update_rating_indexes(sender, using, **kwargs):
+    """ Восстанавливает индексы рейтинга произведений после миграций. """
+
+    connection = connections[using]
+    if Title._meta.db_table in connection.introspection.table_names():
+        create_rating_indexes(connection)
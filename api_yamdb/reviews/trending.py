@@ -0,0 +1,168 @@
+import math
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (GenreTitle, Review, Title, TrendingGenreTitle,
+                     TrendingState, TrendingTitle)
+
+# Точка отсчета времени для log_score. Вклад отзыва растет
+# экспоненциально с датой публикации, поэтому в таблице хранится
+# логарифм суммы вкладов.
+TRENDING_EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    """ Скорость затухания 1 / tau для периода полураспада
+    TRENDING_HALF_LIFE. """
+
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def review_log_score(score, pub_date):
+    return (math.log(score)
+            + (pub_date - TRENDING_EPOCH).total_seconds() * decay_rate())
+
+
+def add_log_scores(first, second):
+    """ Возвращает log(exp(first) + exp(second)) без переполнения. """
+
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(log_score, now=None):
+    """ Сумма оценок отзывов с учетом затухания на момент now. """
+
+    now = now or timezone.now()
+    return math.exp(
+        log_score - (now - TRENDING_EPOCH).total_seconds() * decay_rate())
+
+
+def new_reviews(state, until=None):
+    reviews = Review.objects.order_by('pub_date', 'id')
+    if state.review_pub_date is not None:
+        reviews = reviews.filter(
+            Q(pub_date__gt=state.review_pub_date)
+            | Q(pub_date=state.review_pub_date, id__gt=state.review_id))
+    if until is not None:
+        reviews = reviews.filter(pub_date__lte=until)
+    return reviews.values_list('id', 'title_id', 'score', 'pub_date')
+
+
+def update_titles(contributions):
+    """ Добавляет вклады отзывов к популярности произведений и
+    возвращает новые значения log_score. """
+
+    categories = dict(Title.objects.filter(
+        pk__in=list(contributions)).values_list('pk', 'category_id'))
+    existing = TrendingTitle.objects.in_bulk(list(categories))
+    created, updated, scores = [], [], {}
+    for title_id, category_id in categories.items():
+        trending = existing.get(title_id)
+        if trending is None:
+            trending = TrendingTitle(title_id=title_id, log_score=None)
+            created.append(trending)
+        else:
+            updated.append(trending)
+        trending.category_id = category_id
+        trending.log_score = add_log_scores(
+            trending.log_score, contributions[title_id])
+        scores[title_id] = trending.log_score
+    TrendingTitle.objects.bulk_create(created)
+    TrendingTitle.objects.bulk_update(updated, ('category', 'log_score'))
+    return scores
+
+
+def update_genres(scores):
+    """ Копирует популярность произведений в их текущие жанры. """
+
+    links = set(GenreTitle.objects.filter(
+        title_id__in=list(scores)).values_list('title_id', 'genre_id'))
+    existing = TrendingGenreTitle.objects.filter(title_id__in=list(scores))
+    updated, stale = [], []
+    for trending in existing:
+        key = (trending.title_id, trending.genre_id)
+        if key in links:
+            links.discard(key)
+            trending.log_score = scores[trending.title_id]
+            updated.append(trending)
+        else:
+            stale.append(trending.pk)
+    TrendingGenreTitle.objects.filter(pk__in=stale).delete()
+    TrendingGenreTitle.objects.bulk_update(updated, ('log_score',))
+    TrendingGenreTitle.objects.bulk_create(
+        TrendingGenreTitle(title_id=title_id, genre_id=genre_id,
+                           log_score=scores[title_id])
+        for title_id, genre_id in links)
+
+
+def fold_batch(state, batch_size, until=None):
+    """ Учитывает в популярности одну пачку новых отзывов и сдвигает
+    позицию последнего учтенного отзыва. Возвращает размер пачки. """
+
+    rows = list(new_reviews(state, until)[:batch_size])
+    if not rows:
+        return 0
+    contributions = {}
+    for _, title_id, score, pub_date in rows:
+        contributions[title_id] = add_log_scores(
+            contributions.get(title_id), review_log_score(score, pub_date))
+    update_genres(update_titles(contributions))
+    state.review_id, _, _, state.review_pub_date = rows[-1]
+    state.save()
+    return len(rows)
+
+
+def fold_reviews(batch_size=1000, until=None):
+    """ Учитывает в популярности отзывы, опубликованные после последнего
+    учтенного и не позже until. Возвращает количество отзывов.
+
+    Измененные и удаленные после учета отзывы не пересчитываются, их
+    исправляет rebuild_trending.
+    """
+
+    folded = 0
+    while True:
+        with transaction.atomic():
+            state, _ = TrendingState.objects.select_for_update(
+            ).get_or_create(pk=1)
+            count = fold_batch(state, batch_size, until)
+        if not count:
+            return folded
+        folded += count
+
+
+@transaction.atomic
+def rebuild_trending(batch_size=1000, until=None):
+    """ Пересчитывает популярность всех произведений заново. """
+
+    TrendingState.objects.select_for_update().get_or_create(pk=1)
+    TrendingGenreTitle.objects.all().delete()
+    TrendingTitle.objects.all().delete()
+    TrendingState.objects.update(review_pub_date=None, review_id=0)
+    return fold_reviews(batch_size, until)
+
+
+def top_trending(limit, category=None, genre=None):
+    """ Самые популярные произведения. Для категории и жанра список
+    выбирается по индексу (category, -log_score) или
+    (genre, -log_score). """
+
+    if genre is not None:
+        trending = TrendingGenreTitle.objects.filter(genre__slug=genre)
+        if category is not None:
+            trending = trending.filter(title__category__slug=category)
+    else:
+        trending = TrendingTitle.objects.all()
+        if category is not None:
+            trending = trending.filter(category__slug=category)
+    return trending.filter(title__deleted_at__isnull=True).select_related(
+        'title__category').order_by(
+        '-log_score')[:limit]
@@ -1,11 +1,39 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
+
+
+class SoftDeleteAdminMixin:
+    """ Удаление в админке только скрывает объекты, а их отзывы и
+    комментарии удаляет пачками команда purge_deleted. """
+
+    def get_deleted_objects(self, objs, request):
+        # Сборщик каскада загрузил бы все зависимые объекты только для
+        # страницы подтверждения.
+        return ([str(obj) for obj in objs],
+                {self.model._meta.verbose_name_plural: len(objs)},
+                set(), [])
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.soft_delete()
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'username', 'role', 'is_active', 'is_superuser')
     search_fields = ('username',)
     list_filter = ('role', 'is_active', 'is_superuser')
     empty_value_display = '-пусто-'
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'subject', 'created', 'sent_at',
+                    'attempts')
+    search_fields = ('recipient',)
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
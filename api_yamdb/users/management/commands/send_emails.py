@@ -0,0 +1,119 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from users.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = "Команда для отправки писем из очереди исходящих писем"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, отправляемых через одно соединение.')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Количество попыток отправки одного письма.')
+        parser.add_argument(
+            '--retry-delay', type=int, default=30,
+            help='Задержка перед первой повторной попыткой в секундах, '
+                 'каждая следующая задержка вдвое больше.')
+        parser.add_argument(
+            '--lock-timeout', type=int, default=300,
+            help='Время в секундах, через которое письмо, не отправленное '
+                 'забравшим его процессом, отправляется снова.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершать работу, а проверять очередь каждые '
+                 '--interval секунд.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в секундах.')
+
+    @staticmethod
+    def claim(batch_size, max_attempts, lock_timeout):
+        """ Забирает пачку писем в короткой транзакции: блокирует их до
+        locked_until и засчитывает попытку отправки. """
+
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(Q(locked_until__isnull=True)
+                        | Q(locked_until__lte=now),
+                        sent_at__isnull=True,
+                        send_after__lte=now,
+                        attempts__lt=max_attempts)
+                .order_by('send_after')[:batch_size]
+            )
+            for email in emails:
+                email.attempts += 1
+                email.locked_until = now + timedelta(seconds=lock_timeout)
+            OutgoingEmail.objects.bulk_update(
+                emails, ('attempts', 'locked_until'))
+        return emails
+
+    def send_batch(self, batch_size, max_attempts, retry_delay,
+                   lock_timeout):
+        """ Отправляет одну пачку писем и возвращает ее размер. Письма
+        отправляются вне транзакции, результат записывается для каждого
+        письма сразу после его отправки. """
+
+        emails = self.claim(batch_size, max_attempts, lock_timeout)
+        if not emails:
+            return 0
+        # Одно соединение с почтовым сервером на всю пачку писем
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                self.defer(email, error, retry_delay)
+        else:
+            try:
+                for email in emails:
+                    self.send(connection, email, retry_delay)
+            finally:
+                connection.close()
+        return len(emails)
+
+    @staticmethod
+    def defer(email, error, retry_delay):
+        """ Откладывает письмо с экспоненциально растущей задержкой. """
+
+        OutgoingEmail.objects.filter(pk=email.pk).update(
+            last_error=str(error), locked_until=None,
+            send_after=timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (email.attempts - 1)))
+
+    def send(self, connection, email, retry_delay):
+        message = EmailMessage(email.subject, email.body,
+                               to=[email.recipient], connection=connection)
+        try:
+            message.send()
+        except Exception as error:
+            self.defer(email, error, retry_delay)
+        else:
+            OutgoingEmail.objects.filter(pk=email.pk).update(
+                sent_at=timezone.now(), locked_until=None)
+
+    def handle(self, *args, **options):
+        """ Агрегирующий метод, который вызывается с помощью команды
+        send_emails и отправляет письма из очереди. """
+
+        while True:
+            sent = self.send_batch(options['batch_size'],
+                                   options['max_attempts'],
+                                   options['retry_delay'],
+                                   options['lock_timeout'])
+            if sent:
+                self.stdout.write(f'Обработано писем: {sent}')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Заблокировано до'),
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 # Кортеж с ролями пользователя
 USER_ROLES_CHOICES = (
@@ -10,6 +11,13 @@ USER_ROLES_CHOICES = (
 )
 
 
+class ActiveUserManager(UserManager):
+    """ Менеджер пользователей без удаленных. """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class User(AbstractUser):
     """ Модель пользователя. """
 
@@ -20,11 +28,74 @@ class User(AbstractUser):
     confirmation_code = models.PositiveIntegerField(
         'Код подтверждения', blank=True, null=True,
         validators=(MinValueValidator(10000), MaxValueValidator(99999)))
+    # Удаленный пользователь скрыт и не может войти, а его отзывы и
+    # комментарии удаляет пачками команда purge_deleted.
+    deleted_at = models.DateTimeField(
+        'Дата удаления', blank=True, null=True, editable=False)
+
+    objects = ActiveUserManager()
+    all_objects = UserManager()
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('-date_joined', 'username')
+        indexes = [
+            models.Index(fields=('deleted_at',), name='user_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем имя, чтобы после его смены обновить отметки
+        # изменения отзывов и комментариев пользователя.
+        if 'username' in field_names:
+            instance._loaded_username = values[
+                field_names.index('username')]
+        return instance
+
+    def soft_delete(self):
+        """ Скрывает пользователя до удаления командой purge_deleted. Его
+        отзывы и комментарии вычитаются из агрегатов в той же транзакции
+        (см. reviews.signals). """
+
+        self.deleted_at = timezone.now()
+        self.is_active = False
+        with transaction.atomic():
+            self.save(update_fields=('deleted_at', 'is_active'))
+
+
+class OutgoingEmail(models.Model):
+    """ Модель письма в очереди на отправку. Письма отправляет команда
+    send_emails. """
+
+    recipient = models.EmailField('Получатель')
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после', default=timezone.now)
+    sent_at = models.DateTimeField('Дата отправки', blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(
+        'Количество попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    # Письмо забрал процесс send_emails. Если он не записал результат до
+    # этого времени, письмо снова становится доступным для отправки.
+    locked_until = models.DateTimeField(
+        'Заблокировано до', blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('send_after',)
+        indexes = [
+            # Индекс для выборки писем, ожидающих отправки.
+            models.Index(fields=('sent_at', 'send_after'),
+                         name='outgoing_email_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
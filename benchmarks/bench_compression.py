@@ -0,0 +1,102 @@
+""" Процессорное время сжатия ответов API против сэкономленных байтов.
+
+Ответы берутся из базы бенчмарков тестовым клиентом, каждый сжимается
+gzip и brotli с разными уровнями. Отдельно замеряется процессорное время
+полного запроса с попаданием в кэш: без сжатия, со сжатием на каждом
+запросе и со сжатым вариантом из кэша:
+
+    USE_SQLITE=1 python -m benchmarks.seed
+    USE_SQLITE=1 python -m benchmarks.bench_compression --repeat 200
+"""
+import argparse
+import time
+from unittest import mock
+
+from .common import bench_database, report, setup_django
+
+URLS = {
+    'titles': '/api/v1/titles/',
+    'titles_top_rated': '/api/v1/titles/?ordering=-rating',
+    'genres': '/api/v1/genres/',
+    'reviews': '/api/v1/titles/{title}/reviews/',
+}
+LEVELS = {
+    'gzip': ('GZIP_LEVEL', (1, 6, 9)),
+    'br': ('BROTLI_QUALITY', (1, 5, 11)),
+}
+
+
+def cpu_ms(func, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return round((time.process_time() - started) * 1000 / repeat, 3)
+
+
+def measure_levels(content, repeat):
+    from api.compression import compress
+    from django.test.utils import override_settings
+
+    results = {'identity': {'bytes': len(content)}}
+    for encoding, (setting, levels) in LEVELS.items():
+        for level in levels:
+            with override_settings(**{setting: level}):
+                compressed = compress(content, encoding)
+                results[f'{encoding}-{level}'] = {
+                    'bytes': len(compressed),
+                    'saved_bytes': len(content) - len(compressed),
+                    'ratio': round(len(content) / len(compressed), 2),
+                    'cpu_ms': cpu_ms(
+                        lambda: compress(content, encoding), repeat),
+                }
+    return results
+
+
+def measure_requests(client, url, repeat):
+    """ Процессорное время запроса, ответ на который уже в кэше. """
+
+    from api import cache as api_cache
+
+    def get(encoding):
+        return lambda: client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+    get('br')()
+    results = {'identity': cpu_ms(get(''), repeat),
+               'br_cached_variant': cpu_ms(get('br'), repeat)}
+    # Без сжатого варианта в кэше ответ сжимается на каждом запросе.
+    with mock.patch.object(api_cache, 'get_compressed_variant',
+                           return_value=None):
+        results['br_compress_each'] = cpu_ms(get('br'), repeat)
+    return {name: {'cpu_ms': value} for name, value in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from reviews.models import Title
+
+    client = Client()
+    with bench_database() as connection:
+        title = Title.objects.order_by('-reviews_count').first()
+        results = {'vendor': connection.vendor, 'endpoints': {}}
+        for name, template in URLS.items():
+            url = template.format(title=title.pk)
+            response = client.get(url)
+            endpoint = {'compression': measure_levels(
+                response.content, args.repeat)}
+            # Сжатые варианты хранятся только для кэшируемых ответов.
+            if response.has_header('X-Cache'):
+                endpoint['request'] = measure_requests(
+                    client, url, args.repeat)
+            results['endpoints'][name] = endpoint
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+""" Бенчмарк фильтрации произведений по жанрам и категориям при росте
+таблицы связей жанров с произведениями.
+
+Запрашиваемые жанры и категория связаны с постоянным количеством
+произведений, а на каждом шаге добавляются произведения с другими
+жанрами. Время фильтрации должно зависеть от размера результата, а не
+от размера таблицы связей.
+"""
+import argparse
+import random
+
+from .common import measure, report, setup_django, test_database
+
+
+def seed_catalogue(genres, categories):
+    from reviews.models import Category, Genre
+
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(genres))
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(categories))
+    return (list(Genre.objects.order_by('pk').values_list('pk', flat=True)),
+            list(Category.objects.order_by('pk').values_list(
+                'pk', flat=True)))
+
+
+def seed_titles(count, genre_ids, category_ids, genres_per_title,
+                batch_size):
+    from reviews.models import GenreTitle, Title
+
+    for start in range(0, count, batch_size):
+        last_id = Title.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {start + i}', year=2000,
+                  category_id=random.choice(category_ids))
+            for i in range(min(batch_size, count - start)))
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id in Title.objects.filter(
+                pk__gt=last_id).values_list('pk', flat=True)
+            for genre_id in random.sample(genre_ids, genres_per_title))
+
+
+def first_page(params):
+    """ Запросы, которые выполняет API для первой страницы. """
+
+    from api.filters import TitleFilter
+    from reviews.models import Title
+
+    queryset = TitleFilter(params, queryset=Title.objects.all()).qs
+    queryset.count()
+    list(queryset[:10])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=(10_000, 100_000, 1_000_000),
+                        help='Количество произведений на каждом шаге.')
+    parser.add_argument('--probe-titles', type=int, default=1000,
+                        help='Произведения запрашиваемых жанров.')
+    parser.add_argument('--probe-genres', type=int, default=10)
+    parser.add_argument('--genres', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--genres-per-title', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from reviews.models import GenreTitle
+
+    random.seed(0)
+    slugs = [f'genre-{i}' for i in range(args.probe_genres)]
+    queries = {
+        'genre': [({'genre': ','.join(random.sample(slugs, 2))},)
+                  for _ in range(args.queries)],
+        'genre_all': [({'genre_all': ','.join(random.sample(slugs, 2))},)
+                      for _ in range(args.queries)],
+        'category': [({'category': 'category-0'},)] * args.queries,
+    }
+    with test_database() as connection:
+        genre_ids, category_ids = seed_catalogue(
+            args.genres, args.categories)
+        seed_titles(args.probe_titles, genre_ids[:args.probe_genres],
+                    category_ids[:1], args.genres_per_title,
+                    args.batch_size)
+        results = {'vendor': connection.vendor, 'steps': []}
+        seeded = args.probe_titles
+        for size in sorted(args.sizes):
+            seed_titles(size - seeded, genre_ids[args.probe_genres:],
+                        category_ids[1:], args.genres_per_title,
+                        args.batch_size)
+            seeded = max(seeded, size)
+            step = {'titles': seeded, 'links': GenreTitle.objects.count()}
+            for kind, args_list in queries.items():
+                step[kind] = measure(first_page, args_list)
+            results['steps'].append(step)
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+""" Бенчмарк поиска произведений по названию: полнотекстовый индекс
+против icontains. """
+import argparse
+import random
+import string
+
+from .common import measure, report, setup_django, test_database
+
+
+def make_words(count):
+    return [
+        ''.join(random.choices(string.ascii_lowercase, k=random.randint(4, 9)))
+        for _ in range(count)
+    ]
+
+
+def seed_titles(words, count, batch_size):
+    from reviews.models import Title
+
+    for start in range(0, count, batch_size):
+        Title.objects.bulk_create(
+            Title(name=' '.join(random.choices(words, k=3)), year=2000)
+            for _ in range(min(batch_size, count - start)))
+
+
+def first_page(queryset):
+    """ Запросы, которые выполняет API для первой страницы. """
+
+    queryset.count()
+    list(queryset[:10])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1_000_000)
+    parser.add_argument('--words', type=int, default=20_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from reviews.models import Title
+    from reviews.search import search_titles
+
+    random.seed(0)
+    words = make_words(args.words)
+    # Префиксы существующих слов и слова, которых нет в названиях:
+    # для последних icontains просматривает всю таблицу.
+    queries = {
+        'found': [(word[:random.randint(3, len(word))],)
+                  for word in random.sample(words, args.queries)],
+        'missing': [(word,) for word in make_words(args.queries)],
+    }
+    with test_database() as connection:
+        seed_titles(words, args.titles, args.batch_size)
+        titles = Title.objects.all()
+        results = {'vendor': connection.vendor, 'titles': args.titles}
+        for kind, args_list in queries.items():
+            results[kind] = {
+                'index': measure(
+                    lambda query: first_page(search_titles(titles, query)),
+                    args_list),
+                'icontains': measure(
+                    lambda query: first_page(
+                        titles.filter(name__icontains=query).order_by('pk')),
+                    args_list),
+            }
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
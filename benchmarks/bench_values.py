@@ -0,0 +1,77 @@
+""" Сравнение списков произведений, жанров и категорий, собранных
+сериализаторами DRF и быстрым путем через values() и orjson.
+
+Запросы выполняются тестовым клиентом Django к базе бенчмарков без
+кэша ответов, для каждой страницы проверяется, что оба пути вернули
+одинаковые байты:
+
+    USE_SQLITE=1 python -m benchmarks.seed
+    USE_SQLITE=1 python -m benchmarks.bench_values --requests 500
+"""
+import argparse
+import random
+
+from .common import bench_database, measure, report, setup_django
+from .load import PAGE_SIZE
+
+URLS = {
+    'titles': '/api/v1/titles/?offset={offset}',
+    'titles_top_rated': '/api/v1/titles/?ordering=-rating&offset={offset}',
+    'genres': '/api/v1/genres/',
+    'categories': '/api/v1/categories/',
+}
+MODES = {'serializer': False, 'values': True}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--pages', type=int, default=100,
+                        help='Из скольких первых страниц выбираются '
+                             'запросы.')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    random.seed(0)
+    client = Client()
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, url
+        return response.content
+
+    dummy_cache = {'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    with bench_database() as connection, override_settings(
+            CACHES=dummy_cache):
+        results = {'vendor': connection.vendor, 'endpoints': {}}
+        for name, template in URLS.items():
+            urls = [template.format(
+                offset=PAGE_SIZE * random.randrange(args.pages))
+                for _ in range(args.requests)]
+            endpoint = {}
+            for mode, fast in MODES.items():
+                with override_settings(FAST_LIST_RESPONSES=fast):
+                    endpoint[mode] = measure(get, [(url,) for url in urls])
+                    endpoint[mode]['rps'] = round(
+                        1000 / endpoint[mode]['mean_ms'], 1)
+            for url in set(urls[:20]):
+                with override_settings(FAST_LIST_RESPONSES=False):
+                    expected = get(url)
+                with override_settings(FAST_LIST_RESPONSES=True):
+                    assert get(url) == expected, (
+                        f'Быстрый путь {url} вернул другой ответ')
+            endpoint['speedup'] = round(
+                endpoint['serializer']['mean_ms']
+                / endpoint['values']['mean_ms'], 2)
+            results['endpoints'][name] = endpoint
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+""" Сравнение sync и gthread воркеров gunicorn при одинаковом
+количестве одновременных запросов.
+
+Для каждой конфигурации запускается gunicorn на базе бенчмарков,
+нагрузочный тест из benchmarks.load выполняет одну и ту же смесь
+запросов из --concurrency потоков, после чего измеряется суммарная
+память процессов сервера. Процессы сервера используют общий кэш, чтобы
+sync и gthread отличались только моделью воркеров, а не тем, сколько
+процессов делят кэш ответов: по умолчанию FileBasedCache в отдельной
+временной папке для каждой конфигурации, либо memcached из
+--cache-location:
+
+    USE_SQLITE=1 python -m benchmarks.bench_workers --concurrency 16
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from .common import ROOT_DIR, bench_database, report, setup_django
+from .load import Workload, admin_token, collect, execute, http_runner
+
+CONFIGS = {
+    # Один запрос на процесс: для --concurrency запросов нужно столько
+    # же процессов.
+    'sync': ('--worker-class', 'sync', '--workers', '{concurrency}'),
+    # Один процесс с пулом потоков.
+    'gthread': ('--worker-class', 'gthread', '--workers', '1',
+                '--threads', '{concurrency}'),
+}
+
+
+def server_env(connection):
+    env = dict(os.environ)
+    if connection.vendor == 'sqlite':
+        env['SQLITE_PATH'] = connection.settings_dict['NAME']
+    else:
+        env['DB_NAME'] = connection.settings_dict['NAME']
+    return env
+
+
+def cache_env(location, directory):
+    """ Общий для процессов сервера кэш: memcached по адресу location или
+    файловый кэш в папке directory. """
+
+    if location:
+        return {'CACHE_BACKEND': 'django.core.cache.backends.memcached.'
+                                 'MemcachedCache',
+                'CACHE_LOCATION': location}
+    return {'CACHE_BACKEND': 'django.core.cache.backends.filebased.'
+                             'FileBasedCache',
+            'CACHE_LOCATION': directory}
+
+
+def start_server(config, concurrency, port, env):
+    args = [arg.format(concurrency=concurrency) for arg in CONFIGS[config]]
+    return subprocess.Popen(
+        [sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+         '--config', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{port}', *args,
+         'api_yamdb.wsgi:application'],
+        cwd=os.path.join(ROOT_DIR, 'api_yamdb'), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f'{url}/api/v1/genres/'):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def process_tree_rss(pid):
+    """ Суммарный RSS процесса и его потомков в мегабайтах (Linux). """
+
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            continue
+    return round(total / 1024, 1)
+
+
+def measure_config(config, args, env, requests, token):
+    url = f'http://127.0.0.1:{args.port}'
+    directory = tempfile.TemporaryDirectory()
+    env = dict(env, **cache_env(args.cache_location, directory.name))
+    server = start_server(config, args.concurrency, args.port, env)
+    try:
+        wait_ready(url)
+        run = http_runner(url, token)
+        execute(run, requests[:args.warmup], args.concurrency)
+        started = time.perf_counter()
+        results = execute(run, requests[args.warmup:], args.concurrency)
+        seconds = time.perf_counter() - started
+        result = collect(results, seconds)
+        result['rss_mb'] = process_tree_rss(server.pid)
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+        directory.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS,
+                        default=list(CONFIGS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--sample-size', type=int, default=10_000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--cache-location',
+        help='Адрес memcached, по умолчанию файловый кэш.')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    random.seed(args.seed)
+    with bench_database() as connection:
+        workload = Workload(args.sample_size)
+        token = admin_token()
+        requests = list(workload.requests(args.warmup + args.requests))
+        env = server_env(connection)
+        connection.close()
+        results = {'vendor': connection.vendor,
+                   'concurrency': args.concurrency,
+                   'cache': args.cache_location or 'filebased'}
+        for config in args.configs:
+            results[config] = measure_config(
+                config, args, env, requests, token)
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+""" Общие функции для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория, например:
+
+    USE_SQLITE=1 python -m benchmarks.bench_search --titles 1000000
+
+Данные создаются в отдельной тестовой базе, которая удаляется после
+замера, поэтому рабочая база не затрагивается. Нагрузочный тест
+использует базу бенчмарков, которая сохраняется между запусками:
+
+    USE_SQLITE=1 python -m benchmarks.seed --titles 100000
+    USE_SQLITE=1 python -m benchmarks.load --requests 10000
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from os.path import abspath, dirname, join
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+BENCH_SQLITE_NAME = join(ROOT_DIR, 'benchmarks', 'bench.sqlite3')
+sys.path.insert(0, join(ROOT_DIR, 'api_yamdb'))
+
+
+def setup_django():
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    # Бенчмарки работают в одном процессе или передают кэш серверу сами.
+    os.environ.setdefault('THROTTLE_LOCAL_CACHE', '1')
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """ Создает тестовую базу с примененными миграциями. """
+
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb)
+
+
+@contextmanager
+def bench_database():
+    """ База бенчмарков, которая не удаляется после замера. В SQLite
+    это файл benchmarks/bench.sqlite3, в PostgreSQL — база test_<NAME>.
+    """
+
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = BENCH_SQLITE_NAME
+    with test_database(keepdb=True) as connection:
+        yield connection
+
+
+def percentile(values, q):
+    values = sorted(values)
+    index = min(len(values) - 1, round(q / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summarize(timings):
+    """ Возвращает статистику по длительностям в миллисекундах. """
+
+    timings = [timing * 1000 for timing in timings]
+    return {
+        'count': len(timings),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def measure(func, args_list):
+    """ Вызывает func для каждого набора аргументов и возвращает
+    статистику длительностей. """
+
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def report(results, output=None):
+    """ Печатает результаты в JSON и при необходимости сохраняет их в
+    файл для сравнения между коммитами. """
+
+    data = json.dumps(results, indent=2, ensure_ascii=False)
+    print(data)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(data)
@@ -0,0 +1,234 @@
+""" Нагрузочный тест API на данных из benchmarks.seed.
+
+Запросы выбираются случайно с весами из MIX, популярные произведения
+запрашиваются чаще. По умолчанию запросы выполняются тестовым клиентом
+Django в этом же процессе, что позволяет посчитать SQL запросы:
+
+    USE_SQLITE=1 python -m benchmarks.load --requests 10000
+
+С --url запросы отправляются из --concurrency потоков в запущенный
+сервер, который должен работать с базой бенчмарков (для PostgreSQL
+DB_NAME=test_<DB_NAME>):
+
+    python -m benchmarks.load --url http://localhost:8000 --concurrency 8
+"""
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from .common import bench_database, report, setup_django, summarize
+from .seed import WORDS, zipf_weights
+
+# Вес, метод и шаблон пути запросов. Чтение выполняется анонимно, запись
+# от имени администратора, созданного генератором.
+MIX = {
+    'titles': (30, 'GET', '/api/v1/titles/?offset={offset}'),
+    'titles_genre': (5, 'GET', '/api/v1/titles/?genre={genre}'),
+    'titles_search': (5, 'GET', '/api/v1/titles/?name={word}'),
+    'titles_top_rated': (5, 'GET', '/api/v1/titles/?ordering=-rating'),
+    'title': (15, 'GET', '/api/v1/titles/{title}/'),
+    'trending': (3, 'GET', '/api/v1/titles/trending/?genre={genre}'),
+    'categories': (4, 'GET', '/api/v1/categories/'),
+    'genres': (4, 'GET', '/api/v1/genres/'),
+    'reviews': (15, 'GET', '/api/v1/titles/{title}/reviews/'),
+    'review': (5, 'GET', '/api/v1/titles/{review_title}/reviews/{review}/'),
+    'comments': (6, 'GET',
+                 '/api/v1/titles/{review_title}/reviews/{review}/comments/'),
+    'comment_create': (
+        3, 'POST', '/api/v1/titles/{review_title}/reviews/{review}/comments/'),
+}
+PAGE_SIZE = 100
+
+
+class Workload:
+    """ Последовательность случайных запросов по данным из базы. """
+
+    def __init__(self, sample_size):
+        from django.db.models import Max
+        from reviews.models import Genre, Review, Title
+
+        self.titles = list(Title.objects.order_by(
+            '-reviews_count', 'pk').values_list('pk', flat=True)[
+                :sample_size])
+        if not self.titles:
+            raise SystemExit('База бенчмарков пуста, запустите '
+                             'python -m benchmarks.seed')
+        self.title_weights = list(zipf_weights(len(self.titles), 1))
+        max_review = Review.objects.aggregate(Max('pk'))['pk__max'] or 0
+        self.reviews = list(Review.objects.filter(pk__in=random.sample(
+            range(1, max_review + 1), min(sample_size, max_review)),
+        ).values_list('pk', 'title_id'))
+        self.genres = list(Genre.objects.values_list('slug', flat=True))
+        self.pages = max(1, Title.objects.count() // PAGE_SIZE)
+
+    def params(self):
+        review, review_title = random.choice(self.reviews)
+        return {
+            # Первые страницы списка запрашиваются чаще последних.
+            'offset': PAGE_SIZE * min(self.pages - 1,
+                                      int(random.expovariate(0.5))),
+            'genre': random.choice(self.genres),
+            'word': random.choice(WORDS),
+            'title': random.choices(self.titles, self.title_weights)[0],
+            'review': review,
+            'review_title': review_title,
+        }
+
+    def requests(self, count):
+        names = list(MIX)
+        weights = [MIX[name][0] for name in names]
+        for name in random.choices(names, weights, k=count):
+            _, method, path = MIX[name]
+            yield name, method, path.format(**self.params())
+
+
+def admin_token():
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from users.models import User
+
+    admin = User.objects.filter(role='admin').order_by('pk').first()
+    return str(RefreshToken.for_user(admin).access_token)
+
+
+def client_runner(token):
+    """ Выполняет запросы тестовым клиентом Django и считает SQL
+    запросы. """
+
+    from api.profiling import QueryTimer
+    from django.db import connections
+    from django.test import Client
+
+    client = Client()
+    body = json.dumps({'text': 'Комментарий из нагрузочного теста'})
+
+    def run(method, path):
+        timer = QueryTimer()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            started = time.perf_counter()
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                response = client.post(
+                    path, body, content_type='application/json',
+                    HTTP_AUTHORIZATION=f'Bearer {token}')
+            duration = time.perf_counter() - started
+        return duration, response.status_code, timer.count
+
+    return run
+
+
+def http_runner(url, token):
+    """ Выполняет запросы к запущенному серверу. """
+
+    body = json.dumps({'text': 'Комментарий из нагрузочного теста'})
+
+    def run(method, path):
+        headers = {}
+        data = None
+        if method != 'GET':
+            headers = {'Authorization': f'Bearer {token}',
+                       'Content-Type': 'application/json'}
+            data = body.encode()
+        # Слова для поиска могут быть кириллическими.
+        path = urllib.parse.quote(path, safe='/?=&')
+        request = urllib.request.Request(url.rstrip('/') + path, data,
+                                         headers, method=method)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        return time.perf_counter() - started, status, None
+
+    return run
+
+
+def execute(run, requests, concurrency):
+    def call(request):
+        name, method, path = request
+        return name, run(method, path)
+
+    if concurrency == 1:
+        return [call(request) for request in requests]
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(call, requests))
+
+
+def collect(results, seconds):
+    """ Статистика по каждому типу запроса и по всем запросам. """
+
+    durations = defaultdict(list)
+    queries = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for name, (duration, status, query_count) in results:
+        durations[name].append(duration)
+        statuses[name][status] += 1
+        if query_count is not None:
+            queries[name].append(query_count)
+    endpoints = {}
+    for name in sorted(durations):
+        endpoints[name] = summarize(durations[name])
+        endpoints[name]['statuses'] = dict(statuses[name])
+        if queries[name]:
+            endpoints[name]['queries_mean'] = round(
+                sum(queries[name]) / len(queries[name]), 2)
+    return {
+        'requests': len(results),
+        'seconds': round(seconds, 3),
+        'rps': round(len(results) / seconds, 1),
+        'total': summarize([duration for _, (duration, _, _) in results]),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=500,
+                        help='Запросы перед замером, которые не учитываются.')
+    parser.add_argument('--url', help='Адрес запущенного сервера.')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Количество потоков для --url.')
+    parser.add_argument('--sample-size', type=int, default=10_000,
+                        help='Количество произведений и отзывов, из '
+                             'которых выбираются запросы.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    if args.concurrency > 1 and not args.url:
+        parser.error('--concurrency работает только с --url.')
+
+    setup_django()
+    random.seed(args.seed)
+    with bench_database() as connection:
+        workload = Workload(args.sample_size)
+        token = admin_token()
+        run = (http_runner(args.url, token) if args.url
+               else client_runner(token))
+        execute(run, list(workload.requests(args.warmup)), args.concurrency)
+        requests = list(workload.requests(args.requests))
+        started = time.perf_counter()
+        results = execute(run, requests, args.concurrency)
+        seconds = time.perf_counter() - started
+        report({
+            'mode': 'http' if args.url else 'client',
+            'vendor': connection.vendor,
+            'concurrency': args.concurrency,
+            **collect(results, seconds),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+""" Генератор синтетических данных для нагрузочного тестирования.
+
+Количество отзывов на произведение распределено по закону Ципфа:
+немногие популярные произведения получают большую часть отзывов, так же
+распределены комментарии по отзывам. Объекты создаются пачками через
+bulk_create с заранее известными id, поэтому генератор одинаково
+работает в SQLite и PostgreSQL.
+"""
+import argparse
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from .common import bench_database, setup_django
+
+WORDS = (
+    'мастер ночь город война мир море звезда дорога время тень сердце '
+    'король дом огонь зима лето небо путь остров память сад ветер '
+    'последний белый черный красный тихий долгий новый старый '
+    'star night city war world road time shadow heart king house fire'
+).split()
+
+
+def zipf_weights(count, exponent):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def batched(objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def explicit_dates(*models):
+    """ Отключает auto_now и auto_now_add, чтобы сохранить даты,
+    заданные генератором. """
+
+    fields = [field for model in models for field in model._meta.fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Generator:
+    """ Создает пользователей, каталог, отзывы и комментарии. """
+
+    def __init__(self, args):
+        self.args = args
+        self.now = None
+        self.stats = {}
+
+    def insert(self, model, objects):
+        started = time.monotonic()
+        count = 0
+        for batch in batched(objects, self.args.batch_size):
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        self.stats[model._meta.model_name] = {
+            'rows': count,
+            'seconds': round(time.monotonic() - started, 1),
+        }
+        print(f'{model.__name__}: {count} строк за '
+              f'{self.stats[model._meta.model_name]["seconds"]} с')
+        return count
+
+    def past(self, days):
+        return self.now - timedelta(seconds=random.random() * days * 86400)
+
+    def users(self):
+        from users.models import User
+
+        # Первый пользователь — администратор для запросов на запись.
+        return (User(id=pk, username=f'user{pk}',
+                     email=f'user{pk}@yamdb.fake', password='!',
+                     role='admin' if pk == 1 else 'user',
+                     date_joined=self.past(365))
+                for pk in range(1, self.args.users + 1))
+
+    def catalogue(self):
+        from reviews.models import Category, Genre
+
+        self.insert(Category, (
+            Category(id=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+            for pk in range(1, self.args.categories + 1)))
+        self.insert(Genre, (
+            Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+            for pk in range(1, self.args.genres + 1)))
+
+    def titles(self):
+        from reviews.models import Title
+
+        categories = range(1, self.args.categories + 1)
+        category_weights = zipf_weights(self.args.categories, 1)
+        for pk in range(1, self.args.titles + 1):
+            yield Title(
+                id=pk, name=' '.join(random.choices(WORDS, k=3)),
+                year=random.randint(1950, self.now.year),
+                category_id=random.choices(categories, category_weights)[0],
+                updated_at=self.now)
+
+    def genre_titles(self):
+        from reviews.models import GenreTitle
+
+        genres = range(1, self.args.genres + 1)
+        for title_id in range(1, self.args.titles + 1):
+            for genre_id in random.sample(genres, random.randint(1, 3)):
+                yield GenreTitle(title_id=title_id, genre_id=genre_id)
+
+    def review_counts(self):
+        """ Количество отзывов каждого произведения по закону Ципфа. """
+
+        weights = zipf_weights(self.args.titles, self.args.skew)
+        total = sum(weights)
+        counts = [min(self.args.users, round(self.args.reviews * weight
+                                             / total))
+                  for weight in weights]
+        # Популярными оказываются случайные произведения, а не первые.
+        random.shuffle(counts)
+        return counts
+
+    def reviews(self):
+        from reviews.models import Review
+
+        pk = itertools.count(1)
+        users = range(1, self.args.users + 1)
+        for title_id, count in enumerate(self.review_counts(), start=1):
+            for author_id in random.sample(users, count):
+                pub_date = self.past(self.args.days)
+                yield Review(id=next(pk), title_id=title_id,
+                             author_id=author_id, text='Отзыв',
+                             score=min(10, max(1, round(
+                                 random.gauss(7, 2)))),
+                             pub_date=pub_date, updated_at=pub_date)
+
+    def comments(self, reviews):
+        from reviews.models import Comment
+
+        weights = list(itertools.accumulate(
+            zipf_weights(reviews, self.args.skew)))
+        review_ids = list(range(1, reviews + 1))
+        random.shuffle(review_ids)
+        for pk in range(1, self.args.comments + 1):
+            review_id = random.choices(review_ids, cum_weights=weights)[0]
+            pub_date = self.past(self.args.days)
+            yield Comment(id=pk, review_id=review_id,
+                          author_id=random.randint(1, self.args.users),
+                          text='Комментарий', pub_date=pub_date,
+                          updated_at=pub_date)
+
+    def run(self):
+        from django.core.management import call_command
+        from django.utils import timezone
+        from reviews.models import Comment, GenreTitle, Review, Title
+        from users.models import User
+
+        self.now = timezone.now()
+        with explicit_dates(Title, Review, Comment):
+            self.insert(User, self.users())
+            self.catalogue()
+            self.insert(Title, self.titles())
+            self.insert(GenreTitle, self.genre_titles())
+            reviews = self.insert(Review, self.reviews())
+            self.insert(Comment, self.comments(reviews))
+        self.reset_sequences()
+        call_command('rebuild_aggregates',
+                     '--batch-size', str(self.args.batch_size))
+        call_command('update_trending', '--lag', '0',
+                     '--batch-size', str(self.args.batch_size))
+        return self.stats
+
+    @staticmethod
+    def reset_sequences():
+        from django.core.management.color import no_style
+        from django.db import connection
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title)
+        from users.models import User
+
+        models = (User, Category, Genre, Title, GenreTitle, Review, Comment)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--reviews', type=int, default=1_000_000)
+    parser.add_argument('--comments', type=int, default=3_000_000)
+    parser.add_argument('--skew', type=float, default=1.0,
+                        help='Показатель распределения Ципфа.')
+    parser.add_argument('--days', type=int, default=365,
+                        help='За сколько дней распределены отзывы.')
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--flush', action='store_true',
+                        help='Удалить данные, созданные прошлым запуском.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from reviews.models import Title
+
+    random.seed(0)
+    with bench_database():
+        if Title.objects.exists():
+            if not args.flush:
+                parser.error('База бенчмарков уже заполнена, '
+                             'используйте --flush.')
+            call_command('flush', interactive=False, verbosity=0)
+        started = time.monotonic()
+        Generator(args).run()
+        print(f'Готово за {time.monotonic() - started:.0f} с')
+
+
+if __name__ == '__main__':
+    main()
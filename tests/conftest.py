@@ -1,9 +1,38 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """ Тесты с базой данных запускаем на sqlite в памяти, не изменяя
+    настройки проекта, которые проверяет test_settings. """
+
+    from django.db import connections
+
+    for alias in connections.databases:
+        if hasattr(connections._connections, alias):
+            del connections[alias]
+    connections.databases = {
+        alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+        for alias in connections.databases
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """ Кэш общий для всех тестов, поэтому очищаем его перед каждым. """
+
+    from django.core.cache import cache
+
+    cache.clear()
+
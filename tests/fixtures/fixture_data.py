@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', password='1234567')
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake',
+        password='1234567', role='admin')
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def admin_client(admin):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genre():
+    from reviews.models import Genre
+
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def title(category, genre):
+    from reviews.models import Title
+
+    title = Title.objects.create(name='Титаник', year=1997, category=category)
+    title.genre.add(genre)
+    return title
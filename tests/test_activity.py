@@ -0,0 +1,122 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+URL = '/api/v1/users/{}/activity/'
+
+
+@pytest.fixture
+def moderator_client(django_user_model):
+    from rest_framework.test import APIClient
+
+    moderator = django_user_model.objects.create_user(
+        username='TestModerator', email='moderator@yamdb.fake',
+        role='moderator')
+    client = APIClient()
+    client.force_authenticate(moderator)
+    return client
+
+
+@pytest.fixture
+def activity(user, admin, category):
+    """ Отзывы и комментарии пользователя, часть из которых опубликована
+    одновременно. """
+
+    from reviews.models import Comment, Review, Title
+
+    start = timezone.now() - datetime.timedelta(days=1)
+    titles = [Title.objects.create(name=str(i), year=2000, category=category)
+              for i in range(3)]
+    reviews = [Review.objects.create(title=title, author=user, text='r',
+                                     score=5) for title in titles]
+    other = Review.objects.create(title=titles[0], author=admin, text='a',
+                                  score=1)
+    comments = [Comment.objects.create(review=other, author=user, text='c')
+                for _ in range(4)]
+    expected = []
+    for i, review in enumerate(reviews):
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=start + datetime.timedelta(minutes=i))
+        expected.append((start + datetime.timedelta(minutes=i), 1,
+                         'review', review.pk))
+    for i, comment in enumerate(comments):
+        pub_date = start + datetime.timedelta(minutes=i // 2)
+        Comment.objects.filter(pk=comment.pk).update(pub_date=pub_date)
+        expected.append((pub_date, 0, 'comment', comment.pk))
+    return [(kind, pk) for *_, kind, pk in sorted(expected, reverse=True)]
+
+
+@pytest.mark.django_db
+class TestActivity:
+
+    def test_pages(self, moderator_client, user, activity):
+        url = f'{URL.format(user.username)}?limit=2'
+        items = []
+        while url:
+            data = moderator_client.get(url).json()
+            assert len(data['results']) <= 2
+            items.extend(data['results'])
+            url = data['next']
+        assert [(item['type'], item['id']) for item in items] == activity, (
+            'Проверьте, что лента объединяет отзывы и комментарии от новых '
+            'к старым без пропусков и повторов'
+        )
+        review = next(item for item in items if item['type'] == 'review')
+        assert set(review) == {
+            'type', 'id', 'title', 'text', 'score', 'pub_date'}
+        comment = next(item for item in items if item['type'] == 'comment')
+        assert set(comment) == {
+            'type', 'id', 'title', 'review', 'text', 'pub_date'}
+
+    def test_queries(self, moderator_client, user, activity,
+                     django_assert_num_queries):
+        url = URL.format(user.username)
+        cursor = moderator_client.get(url, {'limit': 3}).json()['next']
+        with django_assert_num_queries(3):
+            response = moderator_client.get(cursor)
+        assert response.status_code == 200
+
+    def test_permissions(self, client, user_client, admin_client, user,
+                         admin, activity):
+        assert client.get(URL.format('me')).status_code == 401
+        assert user_client.get(
+            URL.format(admin.username)).status_code == 403
+        response = user_client.get(URL.format('me'))
+        assert len(response.json()['results']) == len(activity), (
+            'Проверьте, что пользователь видит свою ленту по /me/activity/'
+        )
+        assert len(admin_client.get(
+            URL.format(user.username)).json()['results']) == len(activity)
+        assert admin_client.get(URL.format('nobody')).status_code == 404
+
+    def test_invalid_cursor(self, user_client, activity):
+        response = user_client.get(URL.format('me'), {'cursor': 'broken'})
+        assert response.status_code == 404
+
+    def test_deleted_title(self, user_client, activity):
+        from reviews.models import Review
+
+        Review.objects.filter(author__username='TestUser').first(
+        ).title.soft_delete()
+        response = user_client.get(URL.format('me'))
+        assert len(response.json()['results']) == len(activity) - 1
+
+    @pytest.mark.parametrize('model', ('Review', 'Comment'))
+    def test_index(self, user, model):
+        from django.apps import apps
+        from django.db import connection
+        from reviews.activity import after_position
+
+        queryset = after_position(
+            apps.get_model('reviews', model).objects.filter(author=user),
+            model.lower(), (timezone.now(), 'review', 1))
+        sql, params = queryset.order_by(
+            '-pub_date', '-id')[:10].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'author_pub_date_idx' in plan
+        assert 'TEMP B-TREE' not in plan, (
+            'Проверьте, что лента сортируется по индексу автора'
+        )
@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+
+    url = '/api/v1/cache/stats/'
+
+    def test_user_resolved_from_cache(self, client, admin):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = RefreshToken.for_user(admin).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        assert client.get(self.url, **headers).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(self.url, **headers).status_code == 200
+        assert len(context) == 0, (
+            'Проверьте, что пользователь повторно берется из кэша'
+        )
+
+        admin.role = 'user'
+        admin.save()
+        assert client.get(self.url, **headers).status_code == 403, (
+            'Проверьте, что изменение роли сбрасывает кэш пользователя'
+        )
+
+    def test_cached_fields(self, client, user):
+        from django.core.cache import cache
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = RefreshToken.for_user(user).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        client.get(self.url, **headers)
+        assert 'password' not in str(cache._cache), (
+            'Проверьте, что в кэше хранятся только поля для проверки прав'
+        )
+        response = client.get('/api/v1/users/me/', **headers)
+        assert response.json()['email'] == user.email
+
+        user.is_active = False
+        user.save()
+        assert client.get(self.url, **headers).status_code == 401
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL = '/api/v1/titles/bulk/'
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    def test_create(self, admin_client, category, genre):
+        from reviews.models import Genre, Title
+
+        Genre.objects.create(name='Комедия', slug='comedy')
+        data = [
+            {'name': f'Фильм {i}', 'year': 2000 + i, 'category': 'movie',
+             'genre': ['drama', 'comedy']}
+            for i in range(20)
+        ]
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 201
+        created = response.json()['created']
+        assert [item['index'] for item in created] == list(range(20))
+        title = Title.objects.get(pk=created[3]['id'])
+        assert title.name == 'Фильм 3' and title.category == category
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'}
+
+    def test_item_errors(self, admin_client, category, genre):
+        from reviews.models import Title
+
+        data = [
+            {'name': 'Фильм', 'year': 2000, 'category': 'movie',
+             'genre': ['drama']},
+            {'name': 'Без года', 'category': 'movie', 'genre': ['drama']},
+            {'name': 'Книга', 'year': 2000, 'category': 'book',
+             'genre': ['drama', 'poem']},
+        ]
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 201
+        body = response.json()
+        assert [item['index'] for item in body['created']] == [0]
+        errors = {error['index']: error['errors'] for error in body['errors']}
+        assert set(errors) == {1, 2}
+        assert 'year' in errors[1]
+        assert set(errors[2]) == {'category', 'genre'}
+        assert Title.objects.count() == 1
+
+    def test_slugs_resolved_in_one_query(self, admin_client, category,
+                                         genre):
+        data = [
+            {'name': f'Фильм {i}', 'year': 2000, 'category': 'movie',
+             'genre': ['drama']}
+            for i in range(50)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            admin_client.post(URL, data, format='json')
+        lookups = [query['sql'] for query in context.captured_queries
+                   if 'FROM "reviews_category"' in query['sql']
+                   or 'FROM "reviews_genre"' in query['sql']]
+        assert len(lookups) == 2, (
+            'Проверьте, что категории и жанры всех произведений '
+            'ищутся одним запросом на каждую связь'
+        )
+
+    def test_single_cache_bump(self, admin_client, category, genre):
+        from unittest import mock
+
+        data = [{'name': f'Фильм {i}', 'year': 2000, 'category': 'movie',
+                 'genre': ['drama']} for i in range(5)]
+        with mock.patch('api.cache.bump_versions') as bump_versions:
+            response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 201
+        assert bump_versions.call_count == 1, (
+            'Проверьте, что кэш произведений сбрасывается один раз на запрос'
+        )
+
+    def test_empty_list(self, admin_client):
+        from reviews.models import Title
+
+        response = admin_client.post(URL, [], format='json')
+        assert response.status_code == 200
+        assert response.json() == {'created': [], 'errors': []}
+        assert not Title.objects.exists()
+
+    def test_not_a_list(self, admin_client):
+        response = admin_client.post(URL, {'name': 'Фильм'}, format='json')
+        assert response.status_code == 400
+
+    def test_user_forbidden(self, user_client, category, genre):
+        response = user_client.post(URL, [], format='json')
+        assert response.status_code == 403
@@ -0,0 +1,53 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_hit_after_miss(self, client, title):
+        first = client.get('/api/v1/titles/?year=1997&limit=5')
+        second = client.get('/api/v1/titles/?limit=5&year=1997')
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что ключ кэша не зависит от порядка параметров'
+        )
+        assert first.json() == second.json()
+
+    def test_key_includes_host(self, client, category):
+        from reviews.models import Title
+
+        for i in range(3):
+            Title.objects.create(name=str(i), year=2000, category=category)
+        url = '/api/v1/titles/?limit=2'
+        client.get(url, HTTP_HOST='evil.example')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы для разных хостов кэшируются отдельно'
+        )
+        assert response.json()['next'].startswith('http://testserver/')
+        assert client.get(url, secure=True)['X-Cache'] == 'MISS'
+
+    def test_category_write_resets_cache(self, client, admin_client,
+                                         category):
+        client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/categories/',
+                          {'name': 'Книга', 'slug': 'book'})
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что создание категории сбрасывает кэш категорий'
+        )
+        assert response.json()['count'] == 2
+
+    def test_review_resets_title_cache(self, client, user_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        user_client.post(f'{url}reviews/', {'text': 'Ок', 'score': 4})
+        assert client.get(url).json()['rating'] == 4, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений'
+        )
+
+    def test_stats(self, client, admin_client, title):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        stats = admin_client.get('/api/v1/cache/stats/').json()
+        assert stats == {'hits': 1, 'misses': 1}
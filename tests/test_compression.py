@@ -0,0 +1,84 @@
+import gzip
+
+import brotli
+import pytest
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def titles(category):
+    from reviews.models import Title
+
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category,
+              description='Длинное описание произведения')
+        for i in range(30))
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    def test_gzip(self, client, titles):
+        plain = client.get(URL)
+        response = client.get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert int(response['Content-Length']) == len(response.content)
+        assert gzip.decompress(response.content) == plain.content
+
+    @pytest.mark.parametrize('header, encoding', (
+        ('gzip, deflate, br', 'br'),
+        ('br;q=0.5, gzip', 'gzip'),
+        ('br;q=0, *', 'gzip'),
+        ('identity', None),
+        ('gzip;q=0', None),
+    ))
+    def test_negotiation(self, client, titles, header, encoding):
+        response = client.get(URL, HTTP_ACCEPT_ENCODING=header)
+        assert response.get('Content-Encoding') == encoding, (
+            f'Проверьте выбор кодировки для Accept-Encoding: {header}'
+        )
+
+    def test_min_size(self, client, titles, settings):
+        settings.COMPRESSION_MIN_SIZE = 10 ** 6
+        response = client.get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что маленькие ответы не сжимаются'
+        )
+
+    def test_cached_variant(self, client, titles, monkeypatch):
+        from api import compression
+
+        calls = []
+        compress = compression.compress
+        monkeypatch.setattr(compression, 'compress', lambda *args: (
+            calls.append(args) or compress(*args)))
+        first = client.get(URL, HTTP_ACCEPT_ENCODING='br')
+        second = client.get(URL, HTTP_ACCEPT_ENCODING='br')
+        assert second['X-Cache'] == 'HIT'
+        assert second['Content-Encoding'] == 'br'
+        assert second.content == first.content
+        assert len(calls) == 1, (
+            'Проверьте, что повторный запрос берет сжатый ответ из кэша'
+        )
+        assert brotli.decompress(second.content) == client.get(URL).content
+
+    def test_weak_etag(self, client, title, settings):
+        settings.COMPRESSION_MIN_SIZE = 0
+        url = f'{URL}{title.pk}/'
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['ETag'].startswith('W/"')
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                              HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+
+    def test_streaming(self, admin_client, title):
+        plain = b''.join(admin_client.get(f'{URL}export/').streaming_content)
+        response = admin_client.get(f'{URL}export/',
+                                    HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert not response.has_header('Content-Length')
+        assert gzip.decompress(
+            b''.join(response.streaming_content)) == plain
@@ -0,0 +1,81 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_not_modified(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадающем If-None-Match возвращается 304'
+        )
+        assert not response.content
+
+    def test_if_modified_since(self, client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304, (
+            'Проверьте, что при неизменном списке отзывов '
+            'If-Modified-Since возвращает 304'
+        )
+
+    def test_review_changes_etag(self, client, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        user_client.post(url, {'text': 'Ок', 'score': 4})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        assert response.json()['count'] == 1
+
+    def test_comment_changes_review_comments_etag(self, client, user_client,
+                                                 title):
+        review = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Ок', 'score': 4}).json()
+        url = f'/api/v1/titles/{title.id}/reviews/{review["id"]}/comments/'
+        etag = client.get(url)['ETag']
+        user_client.post(url, {'text': 'Согласен'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка комментариев'
+        )
+
+    def test_rename_changes_etags(self, client, user_client, admin_client,
+                                  user, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(url, {'text': 'Ок', 'score': 4}).json()
+        comments = f'{url}{review["id"]}/comments/'
+        user_client.post(comments, {'text': 'Согласен'})
+        urls = (url, f'{url}{review["id"]}/', comments)
+        etags = [client.get(item)['ETag'] for item in urls]
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'username': 'Renamed'})
+        assert response.status_code == 200
+        for item, etag in zip(urls, etags):
+            response = client.get(item, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что смена имени автора меняет ETag его отзывов '
+                'и комментариев'
+            )
+
+    def test_etag_depends_on_format(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_ACCEPT='text/html',
+                              HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что JSON и браузерный API получают разные ETag'
+        )
+
+    def test_missing_title(self, client):
+        response = client.get('/api/v1/titles/999/')
+        assert response.status_code == 404
+        assert not response.has_header('ETag')
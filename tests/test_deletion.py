@@ -0,0 +1,164 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def reviews(user, admin, title):
+    from reviews.models import Comment, Review, Title
+
+    other = Title.objects.create(name='Аватар', year=2009)
+    review = Review.objects.create(
+        title=title, author=user, text='Отзыв', score=4)
+    other_review = Review.objects.create(
+        title=other, author=admin, text='Другой', score=8)
+    Review.objects.create(title=other, author=user, text='Плохо', score=1)
+    for i in range(5):
+        Comment.objects.create(review=review, author=admin, text=str(i))
+        Comment.objects.create(review=other_review, author=user, text=str(i))
+    return review, other_review
+
+
+@pytest.mark.django_db
+class TestSoftDelete:
+
+    def test_title_hidden(self, client, admin_client, title, reviews):
+        from reviews.models import Review, Title
+
+        url = f'/api/v1/titles/{title.pk}/'
+        review_url = f'{url}reviews/{reviews[0].pk}/'
+        assert admin_client.delete(url).status_code == 204
+        assert client.get(url).status_code == 404
+        assert [row['id'] for row in client.get(
+            '/api/v1/titles/').json()['results']] == [reviews[1].title_id]
+        assert client.get(f'{url}reviews/').status_code == 404
+        assert client.get(f'{review_url}comments/').status_code == 404
+        assert Title.all_objects.filter(pk=title.pk).exists()
+        assert Review.objects.filter(title=title).exists(), (
+            'Проверьте, что отзывы удаляются не в запросе, а командой '
+            'purge_deleted'
+        )
+
+    def test_user_hidden(self, client, admin_client, user, reviews):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = RefreshToken.for_user(user).access_token
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/').status_code == 404
+        assert client.get('/api/v1/users/me/',
+                          HTTP_AUTHORIZATION=f'Bearer {token}',
+                          ).status_code == 401
+        url = f'/api/v1/titles/{reviews[1].title_id}/reviews/'
+        assert [row['id'] for row in client.get(url).json()['results']] == [
+            reviews[1].pk], 'Проверьте, что отзывы удаленных авторов скрыты'
+        comments = client.get(f'{url}{reviews[1].pk}/comments/')
+        assert comments.json()['count'] == 0
+        response = client.post('/api/v1/auth/signup/', {
+            'username': user.username, 'email': 'new@yamdb.fake'})
+        assert response.status_code == 400, (
+            'Проверьте, что имя скрытого пользователя остается занятым'
+        )
+
+    def test_user_aggregates(self, client, admin_client, user, title,
+                             reviews):
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = client.get(f'{url}reviews/')['ETag']
+        comments_url = (f'/api/v1/titles/{reviews[1].title_id}/reviews/'
+                        f'{reviews[1].pk}/comments/')
+        comments_etag = client.get(comments_url)['ETag']
+        assert client.get(url).json()['rating'] == 4
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = client.get(f'{url}reviews/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что скрытие автора изменяет список отзывов'
+        )
+        assert response.json()['count'] == 0
+        assert client.get(url).json()['rating'] is None, (
+            'Проверьте, что отзывы скрытого автора не учитываются в рейтинге'
+        )
+        other = client.get(f'/api/v1/titles/{reviews[1].title_id}/',
+                           {'expand': 'reviews_count'}).json()
+        assert (other['rating'], other['reviews_count']) == (8, 1)
+        reviews[1].refresh_from_db()
+        assert reviews[1].comments_count == 0
+        assert client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag,
+                          ).status_code == 200
+        call_command('rebuild_aggregates', '--check')
+
+    def test_admin(self, rf, admin, title, reviews):
+        from django.contrib.admin.sites import site
+        from reviews.models import Review, Title
+
+        model_admin = site._registry[Title]
+        request = rf.post('/')
+        request.user = admin
+        deleted, counts, _, _ = model_admin.get_deleted_objects(
+            [title], request)
+        assert deleted == [str(title)]
+        model_admin.delete_queryset(request, Title.objects.all())
+        assert not Title.objects.exists()
+        assert Review.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestPurgeDeleted:
+
+    def test_purge_title(self, title, reviews):
+        from reviews.models import Comment, GenreTitle, Review, Title
+
+        title.soft_delete()
+        call_command('purge_deleted', '--batch-size', '2')
+        assert not Title.all_objects.filter(pk=title.pk).exists()
+        assert not GenreTitle.objects.filter(title_id=title.pk).exists()
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 5
+        call_command('rebuild_aggregates', '--check')
+
+    def test_purge_user(self, user, title, reviews):
+        from reviews.models import Comment, Review, Title, User
+
+        user.soft_delete()
+        call_command('purge_deleted', '--batch-size', '2')
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert list(Review.objects.values_list('pk', flat=True)) == [
+            reviews[1].pk]
+        assert not Comment.objects.exists()
+        call_command('rebuild_aggregates', '--check')
+        other = Title.objects.get(pk=reviews[1].title_id)
+        assert (other.reviews_count, other.rating) == (1, 8), (
+            'Проверьте, что удаление отзывов пользователя обновляет '
+            'рейтинг произведений'
+        )
+
+    def test_batches(self, title, reviews):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        title.soft_delete()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_deleted', '--batch-size', '2')
+        deletes = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "reviews_comment"')]
+        assert len(deletes) == 3, (
+            'Проверьте, что комментарии удаляются пачками'
+        )
+
+    def test_queries_per_batch(self, user, admin, title, reviews):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Comment, Review
+
+        Review.objects.filter(pk=reviews[0].pk).update(comments_count=0)
+        Comment.objects.bulk_create(
+            Comment(review=reviews[0], author=admin, text=str(i))
+            for i in range(100))
+        title.soft_delete()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_deleted', '--batch-size', '1000')
+        assert len(queries) < 40, (
+            'Проверьте, что строки удаляются пачками без сигналов для '
+            'каждой строки'
+        )
+        assert not Comment.objects.filter(review__title=title).exists()
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+URL = '/api/v1/titles/export/'
+
+
+@pytest.fixture
+def catalogue(title, user, admin):
+    from reviews.models import Comment, Review, Title
+
+    review = Review.objects.create(title=title, author=user, text='Ок',
+                                   score=8)
+    Comment.objects.create(review=review, author=admin, text='Согласен')
+    Title.objects.create(name='Матрица', year=1999)
+    return title
+
+
+def read_lines(response):
+    return b''.join(response.streaming_content).decode().splitlines()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_ndjson(self, admin_client, catalogue):
+        response = admin_client.get(URL, {'comments': 1})
+        assert response.status_code == 200
+        titles = [json.loads(line) for line in read_lines(response)]
+        assert [title['name'] for title in titles] == ['Титаник', 'Матрица']
+        first = titles[0]
+        assert first['category'] == 'movie' and first['genre'] == ['drama']
+        assert first['rating'] == 8
+        review = first['reviews'][0]
+        assert review['author'] == 'TestUser'
+        assert review['comments'][0]['text'] == 'Согласен'
+        assert titles[1]['reviews'] == []
+
+    def test_csv(self, admin_client, catalogue):
+        response = admin_client.get(URL, {'output': 'csv', 'reviews': 1})
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(read_lines(response)))
+        assert [row['name'] for row in rows] == ['Титаник', 'Матрица']
+        assert rows[0]['review_score'] == '8'
+        assert rows[1]['review_id'] == ''
+
+    def test_resume(self, admin_client, catalogue):
+        response = admin_client.get(URL, {'after': catalogue.id})
+        titles = [json.loads(line) for line in read_lines(response)]
+        assert [title['name'] for title in titles] == ['Матрица'], (
+            'Проверьте, что выгрузка продолжается после указанного id'
+        )
+
+    def test_merge(self, user, admin, catalogue):
+        from reviews.export import export_titles
+        from reviews.models import Comment, Review, Title
+
+        titles = [Title.objects.create(name=str(i), year=2000)
+                  for i in range(3)]
+        expected = {title.pk: [] for title in Title.objects.all()}
+        expected[catalogue.pk] = [1]
+        for title in (titles[0], titles[2], titles[1]):
+            for author, count in ((user, 2), (admin, 0)):
+                review = Review.objects.create(
+                    title=title, author=author, text='', score=5)
+                for _ in range(count):
+                    Comment.objects.create(review=review, author=admin,
+                                           text='')
+                expected.setdefault(title.pk, []).append(count)
+        titles[1].soft_delete()
+        del expected[titles[1].pk]
+        exported = {
+            title['id']: [len(review['comments'])
+                          for review in title['reviews']]
+            for title in export_titles(comments=True, chunk_size=1)}
+        assert exported == expected, (
+            'Проверьте, что отзывы и комментарии достаются своим '
+            'произведениям'
+        )
+
+    def test_bad_params(self, admin_client):
+        assert admin_client.get(URL, {'output': 'xml'}).status_code == 400
+        assert admin_client.get(URL, {'after': '-1'}).status_code == 400
+
+    def test_user_forbidden(self, user_client):
+        assert user_client.get(URL).status_code == 403
+
+    def test_command(self, catalogue):
+        stdout = io.StringIO()
+        call_command('export', '--format', 'csv', '--chunk-size', '1',
+                     stdout=stdout)
+        rows = list(csv.DictReader(io.StringIO(stdout.getvalue())))
+        assert [row['name'] for row in rows] == ['Титаник', 'Матрица']
+        assert rows[0]['genre'] == 'drama'
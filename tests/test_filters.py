@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture
+def catalogue(category, genre, title):
+    from reviews.models import Category, Genre, Title
+
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    title.genre.add(comedy)
+    book = Category.objects.create(name='Книга', slug='book')
+    other = Title.objects.create(name='Двенадцать стульев', year=1928,
+                                 category=book)
+    other.genre.add(comedy)
+    return title, other
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == len(data['results'])
+        return [item['name'] for item in data['results']]
+
+    def test_genre_any(self, client, catalogue):
+        assert self.names(client, 'genre=drama,comedy') == [
+            'Двенадцать стульев', 'Титаник'], (
+            'Проверьте, что произведение с несколькими подходящими '
+            'жанрами не повторяется в выдаче'
+        )
+        assert self.names(client, 'genre=drama') == ['Титаник']
+
+    def test_genre_all(self, client, catalogue):
+        assert self.names(client, 'genre_all=drama,comedy') == ['Титаник']
+        assert self.names(client, 'genre_all=comedy') == [
+            'Двенадцать стульев', 'Титаник']
+        assert self.names(client, 'genre_all=comedy,poem') == []
+
+    def test_category(self, client, catalogue):
+        assert self.names(client, 'category=book') == [
+            'Двенадцать стульев']
+        assert self.names(client, 'category=movie,book&genre=drama') == [
+            'Титаник']
+
+    def test_genre_link_is_unique(self, title, genre):
+        from django.db import IntegrityError, transaction
+        from reviews.models import GenreTitle
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            GenreTitle.objects.create(title=title, genre=genre)
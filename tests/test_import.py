@@ -0,0 +1,55 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+CSV_FILES = {
+    'users': 'id,username,email,role\n1,bingobongo,bingo@yamdb.fake,user\n'
+             '2,capt_obvious,capt@yamdb.fake,admin\n',
+    'category': 'id,name,slug\n1,Фильм,movie\n',
+    'genre': 'id,name,slug\n1,Драма,drama\n',
+    'titles': 'id,name,year,category\n1,Титаник,1997,1\n2,Матрица,1999,\n',
+    'review': 'id,title_id,text,author,score\n1,1,Хорошо,1,8\n'
+              '2,1,Отлично,2,10\n3,5,Нет такого произведения,1,1\n'
+              '4,один,Не число,1,1\n',
+    'comments': 'id,review_id,text,author\n1,1,Согласен,2\n',
+    'genre_title': 'id,title_id,genre_id\n1,1,1\n2,2,1\n',
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, content in CSV_FILES.items():
+        (tmp_path / f'{name}.csv').write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestBulkImport:
+
+    def test_bulk_import(self, data_dir):
+        from reviews.models import Comment, Review, Title
+
+        stderr = io.StringIO()
+        call_command('import', '--bulk', '--batch-size', '1',
+                     '--data-dir', str(data_dir), stderr=stderr)
+        assert 'строка 4, колонка title_id' in stderr.getvalue()
+        assert "строка 5, колонка title_id: 'один'" in stderr.getvalue(), (
+            'Проверьте, что нечисловой id сообщается с номером строки'
+        )
+        assert Review.objects.count() == 2, (
+            'Проверьте, что отзывы на несуществующие произведения пропускаются'
+        )
+        assert Comment.objects.count() == 1
+        title = Title.objects.get(pk=1)
+        assert (title.reviews_count, title.rating) == (2, 9), (
+            'Проверьте, что после загрузки пересчитываются агрегаты рейтинга'
+        )
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
+
+    def test_bulk_import_is_idempotent(self, data_dir):
+        from reviews.models import Review
+
+        call_command('import', '--bulk', '--data-dir', str(data_dir))
+        call_command('import', '--bulk', '--data-dir', str(data_dir))
+        assert Review.objects.count() == 2
@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+
+
+@pytest.fixture
+def ranked(category, user, admin):
+    from reviews.models import Review, Title
+
+    titles = {}
+    for name, year, scores in (('Матрица', 1999, (10, 9)),
+                               ('Аватар', 2009, (7,)),
+                               ('Титаник', 1997, ()),
+                               ('Брат', 1997, (9,))):
+        title = Title.objects.create(name=name, year=year,
+                                     category=category)
+        for author, score in zip((user, admin), scores):
+            Review.objects.create(title=title, author=author, text='Ок',
+                                  score=score)
+        titles[name] = title
+    return titles
+
+
+@pytest.mark.django_db
+class TestTitleOrdering:
+
+    def names(self, client, ordering):
+        response = client.get(f'/api/v1/titles/?ordering={ordering}')
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()['results']]
+
+    def test_rating(self, client, ranked):
+        assert self.names(client, '-rating') == [
+            'Матрица', 'Брат', 'Аватар', 'Титаник'], (
+            'Проверьте, что произведения без рейтинга идут в конце '
+            'списка по убыванию рейтинга'
+        )
+        assert self.names(client, 'rating') == [
+            'Титаник', 'Аватар', 'Брат', 'Матрица']
+
+    def test_reviews_count_year_name(self, client, ranked):
+        assert self.names(client, '-reviews_count')[0] == 'Матрица'
+        assert self.names(client, 'year,name') == [
+            'Брат', 'Титаник', 'Матрица', 'Аватар']
+        assert self.names(client, '-name') == [
+            'Титаник', 'Матрица', 'Брат', 'Аватар']
+
+    def test_unknown_field_ignored(self, client, ranked):
+        assert self.names(client, 'score_sum') == [
+            'Титаник', 'Брат', 'Матрица', 'Аватар'], (
+            'Проверьте, что сортировка по неразрешенному полю '
+            'не применяется'
+        )
+
+    @pytest.mark.parametrize('ordering', (
+        ('-rating', '-id'), ('rating', 'id'), ('-reviews_count', '-id'),
+        ('year', 'id'), ('name', 'id'),
+    ))
+    def test_ordering_uses_index(self, ranked, ordering):
+        from reviews.models import Title
+
+        sql, params = Title.objects.order_by(
+            *ordering)[:10].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что сортировка {ordering} выполняется по индексу'
+        )
@@ -0,0 +1,86 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_email(self, client, settings, tmp_path):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend')
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        response = client.post('/api/v1/auth/signup/',
+                               {'username': 'new', 'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+        assert not list(tmp_path.iterdir()), (
+            'Проверьте, что письмо не отправляется во время регистрации'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'new@yamdb.fake'
+
+        call_command('send_emails')
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        sent = ''.join(path.read_text() for path in tmp_path.iterdir())
+        assert email.body in sent, (
+            'Проверьте, что send_emails отправляет письма из очереди'
+        )
+
+    def test_failed_email_is_retried_later(self, settings):
+        from users.models import OutgoingEmail
+
+        # Почтовый сервер недоступен
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = 'localhost'
+        settings.EMAIL_PORT = 1
+        email = OutgoingEmail.objects.create(
+            recipient='new@yamdb.fake', subject='s', body='b')
+        call_command('send_emails')
+        email.refresh_from_db()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert email.send_after > email.created, (
+            'Проверьте, что неудачная отправка откладывается'
+        )
+
+    def test_claimed_email_is_locked(self):
+        import datetime
+
+        from django.utils import timezone
+        from users.management.commands.send_emails import Command
+        from users.models import OutgoingEmail
+
+        email = OutgoingEmail.objects.create(
+            recipient='new@yamdb.fake', subject='s', body='b')
+        assert Command.claim(10, 5, 60) == [email]
+        assert Command.claim(10, 5, 60) == [], (
+            'Проверьте, что забранное письмо не отправляется повторно'
+        )
+        OutgoingEmail.objects.update(
+            locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        claimed, = Command.claim(10, 5, 60)
+        assert claimed.attempts == 2, (
+            'Проверьте, что письмо, не отправленное забравшим его '
+            'процессом, отправляется снова'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sent_outside_transaction(self):
+        from unittest import mock
+
+        from django.db import connection
+        from users.models import OutgoingEmail
+
+        OutgoingEmail.objects.create(
+            recipient='new@yamdb.fake', subject='s', body='b')
+        atomic = []
+        with mock.patch('django.core.mail.EmailMessage.send',
+                        side_effect=lambda *args: atomic.append(
+                            connection.in_atomic_block)):
+            call_command('send_emails')
+        assert OutgoingEmail.objects.get().sent_at is not None
+        assert atomic == [False], (
+            'Проверьте, что письма отправляются вне транзакции'
+        )
@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_pagination(self, client, django_user_model,
+                                       title):
+        from reviews.models import Review
+
+        for i in range(5):
+            author = django_user_model.objects.create(
+                username=f'user{i}', email=f'{i}@yamdb.fake')
+            Review.objects.create(title=title, author=author, text=str(i),
+                                  score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=2'
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не считает объекты'
+            )
+            assert not any('COUNT(' in query['sql']
+                           for query in context.captured_queries)
+            ids.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert ids == list(
+            Review.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)), (
+            'Проверьте, что курсор проходит все отзывы от новых к старым'
+        )
+
+    def test_same_pub_date(self, client, django_user_model, title):
+        from reviews.models import Review
+
+        for i in range(5):
+            author = django_user_model.objects.create(
+                username=f'user{i}', email=f'{i}@yamdb.fake')
+            Review.objects.create(title=title, author=author, text=str(i),
+                                  score=5)
+        Review.objects.update(pub_date=Review.objects.first().pub_date)
+        expected = list(Review.objects.order_by('-id').values_list(
+            'id', flat=True))
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&limit=2'
+        ids = []
+        pages = []
+        while url:
+            data = client.get(url).json()
+            pages.append(data)
+            ids.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert ids == expected, (
+            'Проверьте, что отзывы с одинаковой датой публикации не '
+            'пропускаются и не повторяются'
+        )
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results']
+        assert previous['next'] is not None
+
+    def test_limit_offset_by_default(self, client, title):
+        data = client.get(f'/api/v1/titles/{title.id}/reviews/').json()
+        assert 'count' in data
@@ -0,0 +1,42 @@
+import logging
+import os
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestProfiling:
+
+    def test_server_timing(self, client, settings, title):
+        settings.SERVER_TIMING = True
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        metrics = {metric.split(';')[0]
+                   for metric in response['Server-Timing'].split(', ')}
+        assert {'db', 'auth', 'permissions', 'serialize', 'render',
+                'total'} <= metrics, (
+            'Проверьте, что заголовок Server-Timing содержит время SQL '
+            'запросов, аутентификации, проверки прав, сериализации и '
+            'рендеринга'
+        )
+
+    def test_disabled(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert not response.has_header('Server-Timing')
+
+    def test_sampled_profile(self, client, settings, tmp_path, title):
+        settings.PROFILING_SAMPLE_RATE = 1
+        settings.PROFILING_DIR = str(tmp_path)
+        client.get('/api/v1/titles/')
+        files = os.listdir(tmp_path)
+        assert len(files) == 1 and files[0].endswith('.prof'), (
+            'Проверьте, что профилируемый запрос сохраняет .prof файл'
+        )
+
+    def test_slow_request_log(self, client, settings, caplog, title):
+        settings.PROFILING_SLOW_REQUEST = 0
+        with caplog.at_level(logging.WARNING, logger='api.profiling'):
+            client.get('/api/v1/titles/')
+        assert any('/api/v1/titles/' in record.getMessage()
+                   for record in caplog.records), (
+            'Проверьте, что медленные запросы записываются в лог'
+        )
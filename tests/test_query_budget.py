@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Допустимое количество запросов к БД для каждого эндпоинта.
+# Оно не должно зависеть от количества объектов в ответе.
+QUERY_BUDGET = {
+    '/api/v1/titles/': 3,
+    '/api/v1/titles/{title}/': 3,
+    '/api/v1/categories/': 2,
+    '/api/v1/genres/': 2,
+    '/api/v1/titles/{title}/reviews/': 4,
+    '/api/v1/titles/{title}/reviews/{review}/': 3,
+    '/api/v1/titles/{title}/reviews/{review}/comments/': 4,
+    '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/': 3,
+    '/api/v1/users/': 2,
+    '/api/v1/users/{username}/': 1,
+    '/api/v1/users/me/': 1,
+}
+
+
+def seed(size):
+    """ Создает size объектов каждого типа, связанных с одним
+    произведением и одним отзывом, и возвращает параметры адресов. """
+
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+    from users.models import User
+
+    users = [User.objects.create(username=f'user{i}', email=f'{i}@yamdb.fake')
+             for i in range(size)]
+    categories = [Category.objects.create(name=f'c{i}', slug=f'c{i}')
+                  for i in range(size)]
+    genres = [Genre.objects.create(name=f'g{i}', slug=f'g{i}')
+              for i in range(size)]
+    titles = [Title.objects.create(name=f't{i}', year=2000,
+                                   category=categories[i])
+              for i in range(size)]
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in titles for genre in genres)
+    reviews = [Review.objects.create(title=titles[0], author=author,
+                                     text='text', score=5)
+               for author in users]
+    Comment.objects.bulk_create(
+        Comment(review=reviews[0], author=author, text='text')
+        for author in users)
+    return {'title': titles[0].id, 'review': reviews[0].id,
+            'comment': Comment.objects.first().id,
+            'username': users[0].username}
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('url', QUERY_BUDGET)
+    @pytest.mark.parametrize('size', (1, 10))
+    def test_query_budget(self, admin_client, url, size):
+        queries = count_queries(admin_client, url.format(**seed(size)))
+        assert queries <= QUERY_BUDGET[url], (
+            f'Запрос к `{url}` при {size} объектах выполняет {queries} '
+            f'запросов к БД вместо {QUERY_BUDGET[url]}'
+        )
@@ -0,0 +1,130 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    url = '/api/v1/titles/{}/reviews/'
+
+    def test_rating_follows_reviews(self, user_client, admin_client, title):
+        response = user_client.post(
+            self.url.format(title.id), {'text': 'Хорошо', 'score': 8})
+        assert response.status_code == 201
+        admin_client.post(
+            self.url.format(title.id), {'text': 'Плохо', 'score': 3})
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (2, 11), (
+            'Проверьте, что создание отзыва обновляет агрегаты произведения'
+        )
+        assert title.rating == 5.5
+
+        review_url = f'{self.url.format(title.id)}{response.data["id"]}/'
+        user_client.patch(review_url, {'score': 10})
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (2, 13), (
+            'Проверьте, что изменение оценки обновляет агрегаты произведения'
+        )
+
+        user_client.delete(review_url)
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (1, 3), (
+            'Проверьте, что удаление отзыва обновляет агрегаты произведения'
+        )
+        assert title.rating == 3
+
+    def test_rating_in_title_response(self, client, user_client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] is None
+        user_client.post(self.url.format(title.id), {'text': 'Ок', 'score': 7})
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == 7
+
+    def test_rebuild_aggregates(self, user, title):
+        from reviews.models import Review, Title
+
+        Review.objects.create(title=title, author=user, text='a', score=9)
+        Title.objects.filter(pk=title.pk).update(
+            reviews_count=0, score_sum=0, rating=None)
+        with pytest.raises(CommandError):
+            call_command('rebuild_aggregates', '--check')
+        call_command('rebuild_aggregates')
+        call_command('rebuild_aggregates', '--check')
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            1, 9, 9.0)
+
+
+@pytest.mark.django_db
+class TestReviewCommentsCount:
+
+    @pytest.fixture
+    def review(self, user, title):
+        from reviews.models import Review
+
+        return Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5)
+
+    def test_count_follows_comments(self, user_client, admin_client, title,
+                                    review):
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        response = user_client.post(url, {'text': 'Первый'})
+        assert response.status_code == 201
+        admin_client.post(url, {'text': 'Второй'})
+        review.refresh_from_db()
+        assert review.comments_count == 2, (
+            'Проверьте, что создание комментария обновляет их количество'
+        )
+        user_client.delete(f'{url}{response.data["id"]}/')
+        review.refresh_from_db()
+        assert review.comments_count == 1, (
+            'Проверьте, что удаление комментария обновляет их количество'
+        )
+
+    def test_move_and_bulk_delete(self, admin, title, review):
+        from reviews.models import Comment, Review
+
+        other = Review.objects.create(
+            title=title, author=admin, text='Другой', score=7)
+        comments = [Comment.objects.create(review=review, author=admin,
+                                           text=str(i)) for i in range(3)]
+        comment = Comment.objects.get(pk=comments[0].pk)
+        comment.review = other
+        comment.save()
+        Comment.objects.filter(review=review).delete()
+        assert list(Review.objects.order_by('pk').values_list(
+            'comments_count', flat=True)) == [0, 1]
+
+    def test_review_list_without_extra_queries(
+            self, client, django_assert_num_queries, admin, title, review):
+        from reviews.models import Comment
+
+        Comment.objects.create(review=review, author=admin, text='Ок')
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.get(url)
+        assert response.json()['results'][0]['comments_count'] == 1
+        with django_assert_num_queries(4):
+            client.get(url)
+
+    def test_review_list_etag_changes(self, client, admin, title, review):
+        from reviews.models import Comment
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = client.get(url)['ETag']
+        Comment.objects.create(review=review, author=admin, text='Ок')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий изменяет список отзывов'
+        )
+
+    def test_rebuild_comments_count(self, admin, review):
+        from reviews.models import Comment, Review
+
+        Comment.objects.create(review=review, author=admin, text='Ок')
+        Review.objects.filter(pk=review.pk).update(comments_count=5)
+        with pytest.raises(CommandError):
+            call_command('rebuild_aggregates', '--check')
+        call_command('rebuild_aggregates')
+        call_command('rebuild_aggregates', '--check')
+        review.refresh_from_db()
+        assert review.comments_count == 1
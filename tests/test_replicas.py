@@ -0,0 +1,145 @@
+import shutil
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+
+REPLICA = 'replica'
+
+
+def add_database(alias, name):
+    connections.databases[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(name)}
+    connections.ensure_defaults(alias)
+    connections.prepare_test_settings(alias)
+
+
+def remove_database(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.databases[alias]
+
+
+@pytest.fixture(scope='session')
+def replica_template(tmp_path_factory, django_db_setup, django_db_blocker):
+    """ Файл SQLite со схемой проекта, копия которого служит репликой. """
+
+    path = tmp_path_factory.mktemp('replica') / 'template.sqlite3'
+    with django_db_blocker.unblock():
+        add_database(REPLICA, path)
+        try:
+            call_command('migrate', database=REPLICA, verbosity=0)
+        finally:
+            remove_database(REPLICA)
+    return path
+
+
+@pytest.fixture
+def replica(db, replica_template, tmp_path, settings):
+    """ Вторая база SQLite вместо реплики, в которую не попадают
+    изменения основной базы. """
+
+    path = tmp_path / 'replica.sqlite3'
+    shutil.copy(replica_template, path)
+    add_database(REPLICA, path)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield REPLICA
+    remove_database(REPLICA)
+
+
+@pytest.fixture
+def replicated_title(replica, title):
+    """ Произведение, которое есть и в основной базе, и в реплике. """
+
+    title.category.save(using=replica)
+    title.save(using=replica)
+    return title
+
+
+# Внутри транзакции теста роутер читает из основной базы.
+@pytest.mark.django_db(transaction=True)
+class TestReplicas:
+
+    def test_reads_from_replica(self, client, replica, genre):
+        from django.core.cache import cache
+        from reviews.models import Genre
+
+        Genre.objects.using(replica).create(name='Реплика', slug='replica')
+        # Время закрепления жанров за основной базой истекло.
+        cache.clear()
+        response = client.get('/api/v1/genres/')
+        assert [item['slug'] for item in response.json()['results']] == [
+            'replica'], (
+            'Проверьте, что безопасные запросы читают данные из реплики'
+        )
+
+    def test_read_your_writes(self, client, user_client, replicated_title):
+        url = f'/api/v1/titles/{replicated_title.pk}/reviews/'
+        response = user_client.post(url, {'text': 'Ок', 'score': 8})
+        assert response.status_code == 201
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что после изменения пользователь читает данные '
+            'из основной базы'
+        )
+        assert client.get(url).json()['count'] == 0
+
+    def test_pin_cookie(self, user_client, replicated_title):
+        from django.core.cache import cache
+
+        url = f'/api/v1/titles/{replicated_title.pk}/reviews/'
+        response = user_client.post(url, {'text': 'Ок', 'score': 8})
+        assert 'primary_until' in response.cookies
+        # Следующий запрос обрабатывает процесс со своим кэшем.
+        cache.clear()
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что клиент закрепляется за основной базой cookie'
+        )
+        user_client.cookies['primary_until'] = '0'
+        assert user_client.get(url).json()['count'] == 0
+
+    def test_changed_resources_read_from_primary(self, client, admin_client,
+                                                 replica):
+        response = admin_client.post(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == 201
+        response = client.get('/api/v1/genres/')
+        assert [item['slug'] for item in response.json()['results']] == [
+            'drama'], (
+            'Проверьте, что ответы по недавно измененным ресурсам '
+            'строятся по основной базе'
+        )
+
+    def test_writes_go_to_primary(self, replicated_title):
+        from reviews.models import Title
+
+        title = Title.objects.using(REPLICA).get(pk=replicated_title.pk)
+        title.name = 'Матрица'
+        title.save()
+        assert Title.objects.get(pk=title.pk).name == 'Матрица'
+        assert Title.objects.using(REPLICA).get(
+            pk=title.pk).name == 'Титаник'
+
+
+class TestReplicaSelection:
+
+    def test_round_robin(self, settings):
+        from api.replicas import choose_replica
+
+        settings.DATABASE_REPLICAS = ['first', 'second']
+        chosen = [choose_replica() for _ in range(4)]
+        assert chosen[0] != chosen[1] and chosen[:2] == chosen[2:]
+
+    def test_least_recently_used(self, settings):
+        from api.replicas import choose_replica
+
+        settings.DATABASE_REPLICAS = ['first', 'second', 'third']
+        settings.REPLICA_SELECTION = 'least_recently_used'
+        chosen = [choose_replica() for _ in range(6)]
+        assert sorted(chosen[:3]) == settings.DATABASE_REPLICAS
+        assert chosen[3:] == chosen[:3]
+
+    def test_no_replicas(self, settings):
+        from api.replicas import choose_replica
+
+        settings.DATABASE_REPLICAS = []
+        assert choose_replica() is None
@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    url = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.url, {'name': query})
+        return [title['name'] for title in response.json()['results']]
+
+    def test_prefix_search(self, client, category):
+        from reviews.models import Title
+
+        for name in ('Властелин колец', 'Власть', 'Кольцо', 'Матрица'):
+            Title.objects.create(name=name, year=2000, category=category)
+        assert sorted(self.search(client, 'влас')) == [
+            'Властелин колец', 'Власть']
+        assert self.search(client, 'ВЛАСТЕЛИН кол') == ['Властелин колец'], (
+            'Проверьте, что поиск требует совпадения каждого слова запроса'
+        )
+        assert self.search(client, 'атрица') == []
+
+    def test_index_follows_changes(self, client, title):
+        title.name = 'Аватар'
+        title.save()
+        assert self.search(client, 'ава') == ['Аватар']
+        assert self.search(client, 'тит') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении'
+        )
+        title.delete()
+        assert self.search(client, 'ава') == []
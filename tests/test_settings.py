@@ -9,3 +9,11 @@ class TestSettings:
         assert settings.DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql', (
             'Проверьте, что используете базу данных postgresql'
         )
+
+    def test_env_flag(self, monkeypatch):
+        for value, expected in (('1', True), ('True', True), ('yes', True),
+                                ('0', False), ('false', False), ('', False)):
+            monkeypatch.setenv('SERVER_TIMING', value)
+            assert settings.env_flag('SERVER_TIMING') is expected, (
+                f'Проверьте, что SERVER_TIMING={value} разбирается явно'
+            )
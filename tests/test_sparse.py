@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def review(title, user, admin):
+    from reviews.models import Comment, Review
+
+    review = Review.objects.create(title=title, author=user, text='Ок',
+                                   score=8)
+    Comment.objects.create(review=review, author=admin, text='Согласен')
+    return review
+
+
+def get(client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return response.json(), [query['sql'] for query in context]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_fields(self, client, title):
+        data, queries = get(client, '/api/v1/titles/',
+                            {'fields': 'id,name,rating'})
+        assert data['results'] == [
+            {'id': title.pk, 'name': 'Титаник', 'rating': None}]
+        assert len(queries) == 2, (
+            'Проверьте, что без жанров и категории не выполняются запросы '
+            'за ними'
+        )
+        assert 'description' not in queries[-1]
+        assert 'reviews_category' not in queries[-1]
+
+    def test_omit(self, client, title):
+        data, queries = get(client, f'/api/v1/titles/{title.pk}/',
+                            {'omit': 'genre,description'})
+        assert set(data) == {'id', 'name', 'year', 'rating', 'category'}
+        assert data['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert not any('reviews_genre' in query for query in queries)
+
+    def test_expand(self, client, title, review):
+        data, _ = get(client, '/api/v1/titles/', {})
+        assert 'reviews_count' not in data['results'][0], (
+            'Проверьте, что раскрываемые поля выводятся только по запросу'
+        )
+        data, _ = get(client, '/api/v1/titles/', {'expand': 'reviews_count'})
+        assert data['results'][0]['reviews_count'] == 1
+
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data, queries = get(client, url, {'expand': 'comments'})
+        assert data['results'][0]['comments'][0]['author'] == 'TestAdmin'
+        data, expanded = get(client, url, {'expand': 'comments',
+                                           'fields': 'id,comments'})
+        assert data['results'] == [{
+            'id': review.pk,
+            'comments': [{'id': review.comments.get().pk, 'text': 'Согласен',
+                          'author': 'TestAdmin',
+                          'pub_date': data['results'][0]['comments'][0][
+                              'pub_date']}],
+        }]
+        assert len(expanded) == len(queries)
+
+    def test_cursor_pagination(self, client, title, review):
+        data, queries = get(client, f'/api/v1/titles/{title.pk}/reviews/',
+                            {'pagination': 'cursor', 'fields': 'id'})
+        assert data['results'] == [{'id': review.pk}]
+        assert len(queries) == 3, (
+            'Проверьте, что поля сортировки курсора загружаются вместе '
+            'с отзывами'
+        )
+
+    def test_write_response_unchanged(self, user_client, title):
+        response = user_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/?fields=id',
+            {'text': 'Ок', 'score': 8})
+        assert response.status_code == 201
+        assert set(response.json()) == {
+            'id', 'text', 'author', 'score', 'pub_date', 'comments_count'}
+
+    def test_users(self, admin_client, admin):
+        data, queries = get(admin_client, '/api/v1/users/',
+                            {'fields': 'username'})
+        assert data['results'] == [{'username': 'TestAdmin'}]
+        assert 'bio' not in queries[-1]
@@ -0,0 +1,129 @@
+import threading
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}
+
+    return set_rates
+
+
+class TestTokenBucket:
+
+    def test_take_token(self):
+        from api.throttling import take_token
+
+        with mock.patch('api.throttling.time.time', return_value=1000):
+            assert [take_token('bucket', 3, 60) for _ in range(3)] == [
+                0, 0, 0]
+            assert take_token('bucket', 3, 60) == 20, (
+                'Проверьте, что пустая корзина возвращает время до '
+                'следующего токена'
+            )
+        with mock.patch('api.throttling.time.time', return_value=1020):
+            assert take_token('bucket', 3, 60) == 0
+            assert take_token('bucket', 3, 60) > 0
+
+    def test_concurrent_requests(self):
+        from api.throttling import take_token
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(take_token('shared', 10, 60)))
+            for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(0) == 10, (
+            'Проверьте, что конкурентные запросы не берут лишних токенов'
+        )
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_signup_per_ip(self, client, rates):
+        rates(signup='2/hour')
+        url = '/api/v1/auth/signup/'
+        statuses = [client.post(url, {}).status_code for _ in range(3)]
+        assert statuses == [400, 400, 429]
+        response = client.post(url, {})
+        assert int(response['Retry-After']) > 0
+        assert client.post(url, {}, REMOTE_ADDR='10.0.0.2').status_code == (
+            400), 'Проверьте, что корзины разных IP-адресов независимы'
+
+    def test_forwarded_for(self, client, rates, settings):
+        rates(signup='1/hour')
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        url = '/api/v1/auth/signup/'
+        client.post(url, {}, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        assert client.post(url, {}, HTTP_X_FORWARDED_FOR='2.2.2.2',
+                           ).status_code == 400
+        assert client.post(url, {}, HTTP_X_FORWARDED_FOR='1.1.1.1',
+                           ).status_code == 429
+
+    def test_forwarded_for_ignored_without_proxy(self, client, rates):
+        rates(signup='1/hour')
+        url = '/api/v1/auth/signup/'
+        client.post(url, {}, HTTP_X_FORWARDED_FOR='1.1.1.1')
+        assert client.post(url, {}, HTTP_X_FORWARDED_FOR='2.2.2.2',
+                           ).status_code == 429, (
+            'Проверьте, что без прокси X-Forwarded-For не меняет корзину'
+        )
+
+    def test_token_per_username(self, client, rates, user):
+        rates(token_username='2/hour')
+        url = '/api/v1/auth/token/'
+        data = {'username': user.username, 'confirmation_code': 1}
+        statuses = [
+            client.post(url, data, REMOTE_ADDR=f'10.0.0.{i}').status_code
+            for i in range(3)]
+        assert statuses[-1] == 429, (
+            'Проверьте, что перебор кода одного пользователя с разных '
+            'адресов ограничивается'
+        )
+        data['username'] = 'other'
+        assert client.post(url, data).status_code != 429
+
+    def test_load_shedding(self, client, user_client, admin_client, rates,
+                           title):
+        rates(anon_read='2/min')
+        url = '/api/v1/genres/'
+        statuses = [client.get(url).status_code for _ in range(3)]
+        assert statuses == [200, 200, 503]
+        assert int(client.get(url)['Retry-After']) > 0
+        reviews = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(reviews).status_code == 503
+        assert user_client.get(reviews).status_code == 200, (
+            'Проверьте, что пользователи обслуживаются при перегрузке'
+        )
+        response = admin_client.post(
+            url, {'name': 'Комедия', 'slug': 'comedy'})
+        assert response.status_code == 201
+
+    def test_shared_cache_check(self, client, settings):
+        from api.throttling import check_shared_cache
+
+        settings.THROTTLE_LOCAL_CACHE = False
+        assert [warning.id for warning in check_shared_cache()] == [
+            'api.W001'], (
+            'Проверьте, что LocMemCache для троттлинга вызывает '
+            'предупреждение при запуске'
+        )
+        assert client.get('/api/v1/genres/').status_code == 200, (
+            'Проверьте, что без общего кэша корзины работают в процессе'
+        )
+        settings.THROTTLE_LOCAL_CACHE = True
+        assert check_shared_cache() == []
+        settings.THROTTLE_LOCAL_CACHE = False
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211'}}
+        assert check_shared_cache() == []
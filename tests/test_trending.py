@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+URL = '/api/v1/titles/trending/'
+
+
+@pytest.fixture
+def reviewed(category, genre, title, user, admin):
+    from reviews.models import Category, Review, Title
+
+    book = Category.objects.create(name='Книга', slug='book')
+    other = Title.objects.create(name='Мастер и Маргарита', year=1967,
+                                 category=book)
+    Review.objects.create(title=title, author=user, text='Ок', score=5)
+    Review.objects.create(title=other, author=user, text='Ок', score=9)
+    Review.objects.create(title=other, author=admin, text='Ок', score=8)
+    return title, other
+
+
+def update_trending(*args):
+    call_command('update_trending', '--lag', '0', *args)
+
+
+@pytest.mark.django_db
+class TestTrending:
+
+    def names(self, client, query=''):
+        response = client.get(f'{URL}?{query}')
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()]
+
+    def scores(self, client):
+        return {item['name']: item['score']
+                for item in client.get(URL).json()}
+
+    def test_top(self, client, reviewed):
+        update_trending()
+        assert self.names(client) == ['Мастер и Маргарита', 'Титаник']
+        assert self.names(client, 'limit=1') == ['Мастер и Маргарита']
+        assert self.names(client, 'category=movie') == ['Титаник']
+        assert self.names(client, 'genre=drama') == ['Титаник']
+
+    def test_incremental_fold(self, client, reviewed, admin):
+        from reviews.models import Review, TrendingTitle
+
+        title, other = reviewed
+        update_trending()
+        before = TrendingTitle.objects.get(pk=other.pk).log_score
+        Review.objects.create(title=title, author=admin, text='Ок',
+                              score=10)
+        update_trending()
+        assert TrendingTitle.objects.get(pk=other.pk).log_score == before, (
+            'Проверьте, что уже учтенные отзывы не учитываются повторно'
+        )
+        scores = self.scores(client)
+        assert scores['Титаник'] == pytest.approx(15, rel=0.01), (
+            'Проверьте, что новые отзывы добавляются к популярности'
+        )
+
+    def test_decay(self, client, reviewed, admin):
+        from reviews.models import Review
+
+        title, other = reviewed
+        # Свежий отзыв на 5 важнее старых отзывов на 9 и 8.
+        Review.objects.filter(title=other).update(
+            pub_date=timezone.now() - timedelta(days=14))
+        update_trending()
+        assert self.names(client) == ['Титаник', 'Мастер и Маргарита']
+        scores = self.scores(client)
+        assert scores['Титаник'] == pytest.approx(5, rel=0.01)
+        assert scores['Мастер и Маргарита'] < 1, (
+            'Проверьте, что вклад старых отзывов затухает'
+        )
+
+    def test_rebuild(self, client, reviewed):
+        from reviews.models import Review
+
+        title, other = reviewed
+        update_trending()
+        Review.objects.filter(title=other).delete()
+        update_trending('--rebuild')
+        assert self.names(client) == ['Титаник']
+
+    def test_bad_limit(self, client):
+        assert client.get(f'{URL}?limit=0').status_code == 400
+        assert client.get(f'{URL}?limit=abc').status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?ordering=-rating&limit=2&offset=1',
+    '/api/v1/titles/?genre=drama',
+    '/api/v1/genres/',
+    '/api/v1/genres/?search=Др',
+    '/api/v1/categories/',
+)
+
+
+@pytest.fixture
+def catalogue(title, genre, user, admin):
+    from reviews.models import Genre, Review, Title
+
+    comedy = Genre.objects.create(name='Комедия  "с кавычками"',
+                                  slug='comedy')
+    title.genre.add(comedy)
+    Review.objects.create(title=title, author=user, text='Ок', score=8)
+    Review.objects.create(title=title, author=admin, text='Ок', score=7)
+    matrix = Title.objects.create(name='Матрица \\ 😀', year=1999,
+                                  description='Описание\nв две строки')
+    matrix.genre.add(genre)
+    Title.objects.create(name='Без жанров', year=2000, category=None)
+
+
+def get_content(client, settings, url, fast):
+    settings.FAST_LIST_RESPONSES = fast
+    cache.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.content
+
+
+@pytest.mark.django_db
+class TestValuesList:
+
+    @pytest.mark.parametrize('url', URLS)
+    def test_same_bytes(self, client, settings, catalogue, url):
+        assert get_content(client, settings, url, True) == get_content(
+            client, settings, url, False), (
+            f'Проверьте, что быстрый путь `{url}` возвращает тот же ответ, '
+            f'что и сериализатор'
+        )
+
+    def test_queries(self, client, catalogue):
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/')
+        assert len(context) == 3, (
+            'Проверьте, что жанры страницы выбираются одним запросом'
+        )
+
+    def test_sparse_fields_use_serializer(self, client, catalogue):
+        response = client.get('/api/v1/titles/?fields=id')
+        assert set(response.json()['results'][0]) == {'id'}
+
+    def test_renderer_escapes_line_separators(self):
+        from api.renderers import FastJSONRenderer
+        from rest_framework.renderers import JSONRenderer
+
+        data = {'text': 'строка\u2028и\u2029абзац', 'rating': 7.5}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data)